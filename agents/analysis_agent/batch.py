@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from .valuation import quotes_frame
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+def one_hot(labels):
+    codes, names = pd.factorize(pd.Series(labels), sort=True)
+    matrix = np.zeros((len(labels), len(names)))
+    matrix[np.arange(len(labels)), codes] = 1.0
+    return matrix, [str(n) for n in names]
+
+
+def concentration_levels(percentages):
+    return np.select([percentages > 40, percentages > 25], ['HIGH', 'MEDIUM'], default='LOW')
+
+
+def universe_frame(stocks, tickers):
+    quotes = quotes_frame(stocks).set_index('ticker')
+    frame = quotes.reindex(tickers)
+    frame['priced'] = frame['price'].notna()
+    frame['price'] = frame['price'].fillna(0.0)
+    frame['sector'] = frame['sector'].fillna('Unclassified')
+    frame['region'] = frame['region'].fillna('Other')
+    return frame
+
+
+def sentiment_matrix(news, tickers, classify):
+    positions = {ticker: i for i, ticker in enumerate(tickers)}
+    counts = np.zeros((len(tickers), len(SENTIMENTS)))
+    earnings = np.zeros(len(tickers), dtype=bool)
+    for article in news:
+        i = positions.get(article.get('ticker'))
+        if i is None:
+            continue
+        sentiment, has_earnings = classify(article)
+        counts[i, SENTIMENTS.index(sentiment)] += 1
+        earnings[i] |= has_earnings
+    return counts, earnings
+
+
+def analyze_batch(stocks, news, tickers, weights, classify, portfolio_ids=None, weight_type='value'):
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim != 2 or weights.shape[1] != len(tickers):
+        raise ValueError(f"weights must be a portfolios x {len(tickers)} matrix matching tickers")
+    portfolio_ids = portfolio_ids or [str(i) for i in range(weights.shape[0])]
+    if len(portfolio_ids) != weights.shape[0]:
+        raise ValueError("portfolio_ids must have one entry per weight vector")
+
+    universe = universe_frame(stocks, tickers)
+    priced = universe['priced'].to_numpy()
+    values = weights * universe['price'].to_numpy() if weight_type == 'quantity' else weights.copy()
+    values[:, ~priced] = 0.0
+    totals = values.sum(axis=1)
+    fractions = np.divide(values, totals[:, None], out=np.zeros_like(values), where=totals[:, None] > 0)
+
+    sector_onehot, sectors = one_hot(universe['sector'].tolist())
+    region_onehot, regions = one_hot(universe['region'].tolist())
+    sector_pct = fractions @ sector_onehot * 100
+    region_pct = fractions @ region_onehot * 100
+
+    dominant = sector_pct.argmax(axis=1) if sectors else np.zeros(len(portfolio_ids), dtype=int)
+    concentration = sector_pct.max(axis=1) if sectors else np.zeros(len(portfolio_ids))
+    levels = concentration_levels(np.round(concentration, 1))
+
+    counts, earnings = sentiment_matrix(news, tickers, classify)
+    held = (values > 0).astype(float)
+    sentiment_counts = held @ counts
+    article_totals = counts.sum(axis=1)
+    ticker_scores = np.divide(counts[:, 0] - counts[:, 1], article_totals, out=np.zeros(len(tickers)), where=article_totals > 0)
+    weighted_sentiment = fractions @ ticker_scores
+    earnings_exposure = held * earnings
+
+    ticker_array = np.asarray(tickers)
+    results = []
+    for p, portfolio_id in enumerate(portfolio_ids):
+        sector_row = sector_pct[p]
+        region_row = region_pct[p]
+        results.append({
+            'portfolio_id': portfolio_id,
+            'total_value': round(float(totals[p]), 2),
+            'total_holdings': int(held[p].sum()),
+            'sector_allocation': {sectors[k]: round(float(sector_row[k]), 1) for k in np.flatnonzero(sector_row)},
+            'region_allocation': {regions[k]: round(float(region_row[k]), 1) for k in np.flatnonzero(region_row)},
+            'risk_assessment': {
+                'risk_level': str(levels[p]) if totals[p] > 0 else 'LOW',
+                'dominant_sector': sectors[dominant[p]] if totals[p] > 0 else None,
+                'concentration_percentage': round(float(concentration[p]), 1)
+            },
+            'sentiment_breakdown': dict(zip(SENTIMENTS, sentiment_counts[p].astype(int).tolist())),
+            'weighted_sentiment_score': round(float(weighted_sentiment[p]), 4),
+            'earnings_activity': ticker_array[earnings_exposure[p] > 0].tolist()
+        })
+
+    return {
+        'tickers': list(tickers),
+        'unpriced_tickers': ticker_array[~priced].tolist(),
+        'portfolio_count': len(portfolio_ids),
+        'portfolios': results
+    }
@@ -0,0 +1,77 @@
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, linkage
+
+from .batch import concentration_levels
+
+LINKAGE_METHODS = ('average', 'complete', 'single', 'weighted')
+
+
+def correlation_matrix(returns):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.corrcoef(returns)
+    return np.nan_to_num(np.atleast_2d(corr), nan=0.0)
+
+
+def condensed_distances(corr):
+    # Mantegna's metric on the upper triangle only; scipy's linkage consumes this layout
+    # directly, so the square distance matrix is never built.
+    upper = corr[np.triu_indices(corr.shape[0], k=1)]
+    return np.sqrt(np.clip(0.5 * (1.0 - upper), 0.0, None))
+
+
+def cluster_labels(corr, correlation_threshold=0.7, method='average'):
+    if method not in LINKAGE_METHODS:
+        raise ValueError(f"Unknown linkage method '{method}'. Available: {', '.join(LINKAGE_METHODS)}")
+    if corr.shape[0] < 2:
+        return np.ones(corr.shape[0], dtype=int)
+    tree = linkage(condensed_distances(corr), method=method)
+    cutoff = np.sqrt(0.5 * (1.0 - correlation_threshold))
+    return fcluster(tree, t=cutoff, criterion='distance')
+
+
+def herfindahl(weights):
+    return float(np.sum(weights ** 2))
+
+
+def cluster_concentration(tickers, corr, weights, correlation_threshold=0.7, method='average', top=5):
+    labels = cluster_labels(corr, correlation_threshold, method)
+    weights = np.asarray(weights, dtype=float)
+    total = weights.sum()
+    weights = weights / total if total > 0 else np.zeros_like(weights)
+
+    codes = labels - 1
+    cluster_weights = np.bincount(codes, weights=weights, minlength=codes.max() + 1 if codes.size else 0)
+    holding_hhi = herfindahl(weights)
+    cluster_hhi = herfindahl(cluster_weights)
+
+    ticker_array = np.asarray(tickers)
+    held = weights > 0
+    order = np.argsort(-cluster_weights)[:top]
+    clusters = []
+    for c in order:
+        if cluster_weights[c] <= 0:
+            break
+        members = (codes == c) & held
+        idx = np.flatnonzero(codes == c)
+        block = corr[np.ix_(idx, idx)]
+        mean_corr = (block.sum() - len(idx)) / (len(idx) * (len(idx) - 1)) if len(idx) > 1 else 1.0
+        clusters.append({
+            'weight_percentage': round(float(cluster_weights[c] * 100), 1),
+            'holdings': ticker_array[members].tolist(),
+            'universe_size': int(len(idx)),
+            'average_correlation': round(float(mean_corr), 3)
+        })
+
+    largest = clusters[0]['weight_percentage'] if clusters else 0.0
+    return {
+        'risk_level': str(concentration_levels(np.array(largest))),
+        'largest_cluster_percentage': largest,
+        'herfindahl_index': round(holding_hhi, 4),
+        'cluster_herfindahl_index': round(cluster_hhi, 4),
+        'effective_holdings': round(1 / holding_hhi, 2) if holding_hhi > 0 else None,
+        'effective_number_of_bets': round(1 / cluster_hhi, 2) if cluster_hhi > 0 else None,
+        'number_of_clusters': int(np.count_nonzero(cluster_weights)),
+        'universe_clusters': int(cluster_weights.size),
+        'correlation_threshold': correlation_threshold,
+        'top_clusters': clusters
+    }
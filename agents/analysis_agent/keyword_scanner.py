@@ -0,0 +1,68 @@
+import json
+import re
+
+from ..patterns import build_trie_pattern
+
+INFLECTION_SUFFIX = r"(?:s|es|d|ed|ing|ped|ping)?"
+
+DEFAULT_LEXICONS = {
+    'positive': ['beat', 'surge', 'rise', 'gain', 'up', 'strong', 'growth', 'profit', 'revenue increase', 'bullish', 'positive'],
+    'negative': ['miss', 'fall', 'drop', 'down', 'weak', 'loss', 'decline', 'concern', 'risk', 'bearish', 'negative'],
+    'earnings': ['earnings', 'results', 'quarterly', 'revenue', 'profit', 'eps', 'estimate', 'guidance', 'outlook']
+}
+
+
+class KeywordScanner:
+    def __init__(self, lexicons):
+        self.lexicons = {name: [self.normalize(k) for k in keywords if k.strip()] for name, keywords in lexicons.items()}
+
+        owners = {}
+        for name, words in self.lexicons.items():
+            for keyword in words:
+                owners.setdefault(keyword, set()).add(name)
+
+        # A multi-word match also credits any shorter keywords it contains, so
+        # "revenue increase" still counts "revenue" for the earnings lexicon.
+        self.credits = {}
+        for keyword in owners:
+            words = keyword.split()
+            credited = []
+            for start in range(len(words)):
+                for end in range(start + 1, len(words) + 1):
+                    phrase = ' '.join(words[start:end])
+                    credited.extend((name, phrase) for name in owners.get(phrase, ()))
+            self.credits[keyword] = credited
+
+        self.pattern = None
+        if owners:
+            self.pattern = re.compile(rf"\b({build_trie_pattern(owners)}){INFLECTION_SUFFIX}\b")
+
+    @staticmethod
+    def normalize(keyword):
+        return re.sub(r"\s+", " ", keyword.strip().lower())
+
+    def scan(self, text):
+        matches = {name: set() for name in self.lexicons}
+        if self.pattern is None:
+            return matches
+        for keyword in set(self.pattern.findall(text.lower())):
+            if keyword not in self.credits:
+                keyword = self.normalize(keyword)
+            for name, credited in self.credits[keyword]:
+                matches[name].add(credited)
+        return matches
+
+    def counts(self, text):
+        return {name: len(found) for name, found in self.scan(text).items()}
+
+
+def load_lexicons(defaults, path=None):
+    lexicons = {name: list(words) for name, words in defaults.items()}
+    if not path:
+        return lexicons
+    with open(path) as f:
+        extra = json.load(f)
+    for name, words in extra.items():
+        lexicons.setdefault(name, [])
+        lexicons[name].extend(w for w in words if w not in lexicons[name])
+    return lexicons
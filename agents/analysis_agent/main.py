@@ -1,80 +1,124 @@
+import os
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import uvicorn
 from collections import defaultdict
 import re
+from datetime import date
+import numpy as np
+from .keyword_scanner import DEFAULT_LEXICONS, KeywordScanner, load_lexicons
+from .valuation import value_portfolio
+from .risk_metrics import analyze_risk, covariance_risk, prices_to_returns, align_series
+from .monte_carlo import MonteCarloEngine
+from ..lru import LRUCache
+from .memo import content_digest, payload_digest
+from .online_covariance import OnlineCovariance
+from .batch import analyze_batch
+from .scenarios import run_scenarios
+from .cluster_risk import cluster_concentration, correlation_matrix
+from .technicals import TechnicalIndicators
+from .snapshots import SnapshotStore, compact_allocation, compact_snapshot
 
 app = FastAPI(title="Dynamic Analysis Agent")
 
+MONTE_CARLO_WORKERS = int(os.getenv("ANALYSIS_MC_WORKERS", "0")) or None
+MAX_MONTE_CARLO_PATHS = int(os.getenv("ANALYSIS_MC_MAX_PATHS", "2000000"))
+DATA_DIR = os.getenv("ANALYSIS_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+COVARIANCE_PATH = os.path.join(DATA_DIR, "covariance.npz")
+COVARIANCE_DECAY = float(os.getenv("ANALYSIS_COVARIANCE_DECAY", "0.94"))
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "snapshots.jsonl")
+
+class Holding(BaseModel):
+    ticker: str
+    quantity: float
+    cost_basis: Optional[float] = None
+    currency: Optional[str] = None
+
 class AnalysisRequest(BaseModel):
     stocks: List[Dict[str, Any]]
     news: List[Dict[str, Any]]
+    holdings: Optional[List[Holding]] = None
+    fx_rates: Optional[Dict[str, float]] = None
+    returns: Optional[Dict[str, List[float]]] = None
+    benchmark_returns: Optional[List[float]] = None
+    prices: Optional[Dict[str, List[float]]] = None
+    portfolio_id: Optional[str] = None
+    as_of: Optional[date] = None
+    fields: Optional[List[str]] = None
+
+class RiskRequest(BaseModel):
+    returns: Optional[Dict[str, List[float]]] = None
+    prices: Optional[Dict[str, List[float]]] = None
+    portfolios: Optional[Dict[str, Dict[str, float]]] = None
+    benchmark_returns: Optional[List[float]] = None
+    confidence: float = 0.95
+    risk_free_rate: float = 0.0
+    horizon_days: int = 1
+    covariance_method: str = "ewma"
+
+LEXICON_PATH = os.getenv("ANALYSIS_LEXICON_PATH")
+ARTICLE_CACHE_SIZE = int(os.getenv("ANALYSIS_ARTICLE_CACHE_SIZE", "50000"))
+AGGREGATE_CACHE_SIZE = int(os.getenv("ANALYSIS_AGGREGATE_CACHE_SIZE", "64"))
+ANALYSIS_FIELDS = ('prices', 'allocation', 'risk', 'sentiment', 'earnings')
+SNAPSHOT_FIELDS = {'allocation', 'risk', 'sentiment'}
 
 class AnalysisAgent:
-    def __init__(self):
-        self.positive_indicators = ['beat', 'surge', 'rise', 'gain', 'up', 'strong', 'growth', 'profit', 'revenue increase', 'bullish', 'positive']
-        self.negative_indicators = ['miss', 'fall', 'drop', 'down', 'weak', 'loss', 'decline', 'concern', 'risk', 'bearish', 'negative']
-        self.earnings_keywords = ['earnings', 'results', 'quarterly', 'revenue', 'profit', 'eps', 'estimate', 'guidance', 'outlook']
+    def __init__(self, lexicons=None):
+        lexicons = lexicons or load_lexicons(DEFAULT_LEXICONS, LEXICON_PATH)
+        self.positive_indicators = lexicons['positive']
+        self.negative_indicators = lexicons['negative']
+        self.earnings_keywords = lexicons['earnings']
+        self.scanner = KeywordScanner({
+            'positive': self.positive_indicators,
+            'negative': self.negative_indicators,
+            'earnings': self.earnings_keywords
+        })
+        self.article_cache = LRUCache(ARTICLE_CACHE_SIZE)
+        self.sentiment_cache = LRUCache(AGGREGATE_CACHE_SIZE)
+        self.valuation_cache = LRUCache(AGGREGATE_CACHE_SIZE)
+    
+    def calculate_sector_allocation(self, stocks, holdings=None, fx_rates=None):
+        valuation = self.value_portfolio(stocks, holdings, fx_rates)
+        return valuation['sector_allocation'], valuation['total_value']
     
-    def calculate_sector_allocation(self, stocks):
-        sector_data = {}
-        portfolio_total = 0
+    def classify_article(self, article):
+        title = article.get('title', '')
+        summary = article.get('summary', '')
+        key = content_digest(title, summary)
+        cached = self.article_cache.get(key)
+        if cached is not None:
+            return cached
         
-        for stock in stocks:
-            if isinstance(stock.get('price'), (int, float)) and stock['price'] > 0:
-                sector = stock.get('sector', 'Unclassified')
-                price = stock['price']
-                ticker = stock['ticker']
-                
-                if sector not in sector_data:
-                    sector_data[sector] = {'stock_count': 0, 'total_value': 0, 'tickers': []}
-                
-                sector_data[sector]['stock_count'] += 1
-                sector_data[sector]['total_value'] += price
-                sector_data[sector]['tickers'].append(ticker)
-                portfolio_total += price
-        
-        sector_breakdown = {}
-        for sector in sector_data:
-            data = sector_data[sector]
-            if portfolio_total > 0:
-                percentage = (data['total_value'] / portfolio_total * 100)
-            else:
-                percentage = 0
-            
-            sector_breakdown[sector] = {
-                'allocation_percentage': round(percentage, 1),
-                'number_of_holdings': data['stock_count'],
-                'holdings': data['tickers'],
-                'value': round(data['total_value'], 2)
-            }
+        signals = self.scanner.counts(f"{title} {summary}")
+        positive_signals = signals['positive']
+        negative_signals = signals['negative']
         
-        return sector_breakdown, round(portfolio_total, 2)
+        if positive_signals > negative_signals:
+            sentiment = 'positive'
+        elif negative_signals > positive_signals:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+        
+        classification = (sentiment, signals['earnings'] > 0)
+        self.article_cache.put(key, classification)
+        return classification
     
     def analyze_market_sentiment(self, news):
+        news_key = content_digest(*(
+            f"{article.get('ticker')}|{article.get('title', '')}|{article.get('summary', '')}" for article in news
+        ))
+        cached = self.sentiment_cache.get(news_key)
+        if cached is not None:
+            return cached
+        
         earnings_updates = []
         sentiment_analysis = {'positive': 0, 'negative': 0, 'neutral': 0}
         
         for article in news:
-            title = article.get('title', '').lower()
-            summary = article.get('summary', '').lower()
-            content = f"{title} {summary}"
-            
-            has_earnings_content = any(keyword in content for keyword in self.earnings_keywords)
-            
-            positive_signals = sum(1 for indicator in self.positive_indicators if indicator in content)
-            negative_signals = sum(1 for indicator in self.negative_indicators if indicator in content)
-            
-            if positive_signals > negative_signals:
-                sentiment = 'positive'
-                sentiment_analysis['positive'] += 1
-            elif negative_signals > positive_signals:
-                sentiment = 'negative'
-                sentiment_analysis['negative'] += 1
-            else:
-                sentiment = 'neutral'
-                sentiment_analysis['neutral'] += 1
+            sentiment, has_earnings_content = self.classify_article(article)
+            sentiment_analysis[sentiment] += 1
             
             if has_earnings_content:
                 earnings_updates.append({
@@ -84,7 +128,30 @@ class AnalysisAgent:
                     'sentiment': sentiment
                 })
         
-        return earnings_updates, sentiment_analysis
+        result = (earnings_updates, sentiment_analysis)
+        self.sentiment_cache.put(news_key, result)
+        return result
+    
+    def value_portfolio(self, stocks, holdings=None, fx_rates=None):
+        key = payload_digest([stocks, holdings, fx_rates])
+        valuation = self.valuation_cache.get(key)
+        if valuation is None:
+            valuation = value_portfolio(stocks, holdings, fx_rates)
+            self.valuation_cache.put(key, valuation)
+        return valuation
+    
+    def cache_stats(self):
+        return {
+            'articles': self.article_cache.stats(),
+            'news_aggregates': self.sentiment_cache.stats(),
+            'valuations': self.valuation_cache.stats()
+        }
+    
+    def technical_analysis(self, prices):
+        try:
+            return TechnicalIndicators().fit(prices)
+        except ValueError:
+            return None
     
     def assess_concentration_risk(self, sector_breakdown):
         if not sector_breakdown:
@@ -112,7 +179,7 @@ class AnalysisAgent:
             'concentration_percentage': highest_percentage
         }
     
-    def generate_key_insights(self, sector_breakdown, earnings_updates, sentiment_analysis, risk_assessment):
+    def generate_key_insights(self, sector_breakdown, earnings_updates, sentiment_analysis, risk_assessment, technical_insights=None):
         insights = []
         
         if risk_assessment['dominant_sector'] and risk_assessment['dominant_sector'] != 'Unclassified':
@@ -133,13 +200,28 @@ class AnalysisAgent:
             elif positive_ratio < 0.3:
                 insights.append("Market sentiment showing caution")
         
+        insights.extend(technical_insights or [])
         return insights
     
-    def analyze(self, stocks, news):
-        sector_breakdown, portfolio_value = self.calculate_sector_allocation(stocks)
-        earnings_updates, sentiment_analysis = self.analyze_market_sentiment(news)
+    def analyze(self, stocks, news, holdings=None, fx_rates=None, returns=None, benchmark_returns=None, prices=None,
+                fields=None):
+        fields = set(fields) if fields else set(ANALYSIS_FIELDS)
+        needs_valuation = bool(fields & {'allocation', 'risk'})
+        needs_news = bool(fields & {'sentiment', 'earnings'})
+        
+        if needs_valuation:
+            valuation = self.value_portfolio(stocks, holdings, fx_rates)
+            sector_breakdown, portfolio_value = valuation['sector_allocation'], valuation['total_value']
+        else:
+            valuation, sector_breakdown, portfolio_value = None, {}, None
+        if needs_news:
+            earnings_updates, sentiment_analysis = self.analyze_market_sentiment(news)
+        else:
+            earnings_updates, sentiment_analysis = [], {'positive': 0, 'negative': 0, 'neutral': 0}
         risk_assessment = self.assess_concentration_risk(sector_breakdown)
-        key_insights = self.generate_key_insights(sector_breakdown, earnings_updates, sentiment_analysis, risk_assessment)
+        technicals = self.technical_analysis(prices) if prices else None
+        key_insights = self.generate_key_insights(sector_breakdown, earnings_updates, sentiment_analysis, risk_assessment,
+                                                  technicals['insights'] if technicals else None)
         
         valid_stocks = []
         for s in stocks:
@@ -156,36 +238,368 @@ class AnalysisAgent:
                     'name': stock.get('longName', stock['ticker'])
                 }
 
-        return {
-            "portfolio_overview": {
+        if returns and 'risk' in fields:
+            risk_metrics = analyze_risk(returns, {'portfolio': valuation['market_values']}, benchmark_returns)
+            risk_assessment['risk_metrics'] = {
+                'portfolio': risk_metrics['portfolios'].get('portfolio'),
+                'holdings': risk_metrics['holdings'],
+                'observations': risk_metrics['observations']
+            }
+            tickers, aligned = align_series(returns)
+            if len(tickers) > 1:
+                weights = [valuation['market_values'].get(ticker, 0.0) for ticker in tickers]
+                risk_assessment['cluster_concentration'] = cluster_concentration(
+                    tickers, correlation_matrix(aligned), weights
+                )
+
+        portfolio_overview = {
+            "total_holdings": len(valuation['positions']) if holdings is not None and valuation else len(valid_stocks),
+            "individual_stocks": stock_prices  
+        }
+        if valuation:
+            portfolio_overview.update({
                 "total_value": portfolio_value,
-                "total_holdings": len(valid_stocks),
                 "sector_allocation": sector_breakdown,
-                "individual_stocks": stock_prices  
-            },
-            "risk_assessment": risk_assessment,
-            "market_intelligence": {
+                "region_allocation": valuation['region_allocation'],
+                "currency_allocation": valuation['currency_allocation'],
+                "base_currency": valuation['base_currency'],
+                "missing_fx_rates": valuation['missing_fx_rates'],
+                "unvalued_tickers": valuation['unvalued_tickers']
+            })
+        if valuation and holdings is not None:
+            portfolio_overview.update({
+                "pnl": valuation['pnl'],
+                "positions": valuation['positions']
+            })
+
+        result = {
+            "portfolio_overview": portfolio_overview,
+            "key_insights": key_insights,
+            "fields": sorted(fields)
+        }
+        if 'risk' in fields:
+            result["risk_assessment"] = risk_assessment
+        if needs_news:
+            result["market_intelligence"] = {
                 "earnings_updates": earnings_updates,
                 "sentiment_breakdown": sentiment_analysis,
                 "news_coverage": len(news)
-            },
-            "key_insights": key_insights
-        }
+            }
+        if technicals:
+            result["technical_indicators"] = technicals['indicators']
+        return result
 
+class MonteCarloRequest(BaseModel):
+    returns: Optional[Dict[str, List[float]]] = None
+    covariance_method: str = "ewma"
+    weights: Optional[Dict[str, float]] = None
+    num_paths: int = 100000
+    horizon_days: int = 1
+    confidence: float = 0.95
+    seed: Optional[int] = 42
+    volatility_multiplier: float = 1.0
+    portfolio_value: Optional[float] = None
+
+class TechnicalsRequest(BaseModel):
+    closes: Dict[str, List[float]]
+    highs: Optional[Dict[str, List[float]]] = None
+    lows: Optional[Dict[str, List[float]]] = None
+
+class TechnicalsUpdateRequest(BaseModel):
+    bar: Dict[str, Any]
+
+class CovarianceUpdateRequest(BaseModel):
+    bars: List[Dict[str, Optional[float]]]
+
+class BatchAnalysisRequest(BaseModel):
+    stocks: List[Dict[str, Any]]
+    news: List[Dict[str, Any]] = []
+    tickers: List[str]
+    weights: List[List[float]]
+    portfolio_ids: Optional[List[str]] = None
+    weight_type: str = "value"
+
+class ClusterRiskRequest(BaseModel):
+    returns: Optional[Dict[str, List[float]]] = None
+    weights: Optional[Dict[str, float]] = None
+    covariance_method: str = "ewma"
+    correlation_threshold: float = 0.7
+    linkage_method: str = "average"
+    top_clusters: int = 5
+
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    market_shock: float = 0.0
+    sector_shocks: Optional[Dict[str, float]] = None
+    factor_shocks: Optional[Dict[str, float]] = None
+    ticker_shocks: Optional[Dict[str, float]] = None
+
+class ScenarioRequest(BaseModel):
+    stocks: List[Dict[str, Any]]
+    scenarios: List[Scenario]
+    tickers: Optional[List[str]] = None
+    weights: Optional[List[List[float]]] = None
+    portfolio_ids: Optional[List[str]] = None
+    weight_type: str = "quantity"
+    factor_exposures: Optional[Dict[str, Dict[str, float]]] = None
 
 agent = AnalysisAgent()
+monte_carlo = MonteCarloEngine(workers=MONTE_CARLO_WORKERS)
+covariance = OnlineCovariance.load(COVARIANCE_PATH, lam=COVARIANCE_DECAY)
+technicals = TechnicalIndicators()
+snapshots = SnapshotStore(SNAPSHOT_PATH)
+
+def online_moments(method, tickers=None):
+    # Tickers without a variance estimate yet are left out; unseen pairs count as uncorrelated.
+    selected, cov, _, counts = covariance.covariance(method, tickers)
+    usable = [i for i in range(len(selected)) if np.isfinite(cov[i, i])]
+    selected = [selected[i] for i in usable]
+    cov = np.nan_to_num(cov[np.ix_(usable, usable)], nan=0.0)
+    # The EWMA recursion is zero-mean, so only the Welford estimate carries a drift.
+    drift = covariance.mean(selected) if method == 'welford' else np.zeros(len(selected))
+    observations = int(counts[usable, usable].min()) if usable else 0
+    return selected, drift, cov, observations
 
 @app.post("/analyze")
 def analyze_portfolio(request: AnalysisRequest):
+    unknown = set(request.fields or []) - set(ANALYSIS_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(ANALYSIS_FIELDS)}")
+    try:
+        holdings = [h.dict() for h in request.holdings] if request.holdings is not None else None
+        result = agent.analyze(request.stocks, request.news, holdings, request.fx_rates,
+                               request.returns, request.benchmark_returns, request.prices, request.fields)
+        fields = set(result["fields"])
+        if request.portfolio_id and "allocation" in fields:
+            # Only a full analysis is recorded, but any answer that shows allocations gets the history.
+            as_of = (request.as_of or date.today()).isoformat()
+            if SNAPSHOT_FIELDS <= fields:
+                current = compact_snapshot(result)
+                snapshots.record(request.portfolio_id, as_of, current)
+            else:
+                current = compact_allocation(result)
+            result["history"] = snapshots.compare(request.portfolio_id, current, as_of)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze/batch")
+def analyze_portfolio_batch(request: BatchAnalysisRequest):
+    if request.weight_type not in ("value", "quantity"):
+        raise HTTPException(status_code=400, detail="weight_type must be 'value' or 'quantity'")
+    try:
+        return analyze_batch(
+            request.stocks, request.news, request.tickers, request.weights, agent.classify_article,
+            portfolio_ids=request.portfolio_ids, weight_type=request.weight_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/scenarios")
+def stress_scenarios(request: ScenarioRequest):
+    if request.weight_type not in ("value", "quantity"):
+        raise HTTPException(status_code=400, detail="weight_type must be 'value' or 'quantity'")
+    if not request.scenarios:
+        raise HTTPException(status_code=400, detail="Provide at least one scenario")
     try:
-        result = agent.analyze(request.stocks, request.news)
+        return run_scenarios(
+            request.stocks, [scenario.dict() for scenario in request.scenarios],
+            tickers=request.tickers, weights=request.weights, portfolio_ids=request.portfolio_ids,
+            weight_type=request.weight_type, factor_exposures=request.factor_exposures
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/risk")
+def risk_metrics(request: RiskRequest):
+    if not (0 < request.confidence < 1):
+        raise HTTPException(status_code=400, detail="confidence must be between 0 and 1")
+    returns = dict(request.returns or {})
+    for ticker, prices in (request.prices or {}).items():
+        returns.setdefault(ticker, prices_to_returns(prices).tolist())
+    try:
+        if not returns:
+            # Without posted history, read the streaming covariance estimate instead of rebuilding one.
+            portfolios = {name: {t.upper(): w for t, w in weights.items()} for name, weights in (request.portfolios or {}).items()}
+            wanted = sorted({t for weights in portfolios.values() for t in weights}) or None
+            tickers, drift, cov, observations = online_moments(request.covariance_method, wanted)
+            if not tickers:
+                raise HTTPException(status_code=400, detail="Provide returns or prices, or stream bars to /covariance/update first")
+            return covariance_risk(tickers, cov, drift, portfolios, request.confidence, request.horizon_days, observations)
+        return analyze_risk(
+            returns,
+            portfolios=request.portfolios,
+            benchmark_returns=request.benchmark_returns,
+            confidence=request.confidence,
+            risk_free_rate=request.risk_free_rate,
+            horizon_days=request.horizon_days
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/risk/clusters")
+def cluster_risk(request: ClusterRiskRequest):
+    if not (-1 <= request.correlation_threshold <= 1):
+        raise HTTPException(status_code=400, detail="correlation_threshold must be between -1 and 1")
+    try:
+        if request.returns:
+            tickers, aligned = align_series(request.returns)
+            corr = correlation_matrix(aligned)
+        else:
+            # Without explicit returns, cluster on the streaming correlation estimate.
+            tickers, _, corr, _ = covariance.covariance(request.covariance_method, list(request.weights or {}) or None)
+            corr = np.nan_to_num(corr, nan=0.0)
+            np.fill_diagonal(corr, 1.0)
+        if len(tickers) < 2:
+            raise HTTPException(status_code=400, detail="Need correlation data for at least two tickers")
+        weights = [request.weights.get(t, 0.0) for t in tickers] if request.weights else np.ones(len(tickers))
+        result = cluster_concentration(tickers, corr, weights, request.correlation_threshold,
+                                       request.linkage_method, request.top_clusters)
+        result['tickers'] = len(tickers)
         return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/risk/monte-carlo")
+def monte_carlo_var(request: MonteCarloRequest):
+    if not (0 < request.confidence < 1):
+        raise HTTPException(status_code=400, detail="confidence must be between 0 and 1")
+    if not (0 < request.num_paths <= MAX_MONTE_CARLO_PATHS):
+        raise HTTPException(status_code=400, detail=f"num_paths must be between 1 and {MAX_MONTE_CARLO_PATHS}")
+    try:
+        if request.returns:
+            tickers, returns = align_series(request.returns)
+            log_returns = np.log1p(returns)
+            drift, cov, weights = log_returns.mean(axis=1), np.cov(log_returns), request.weights
+        else:
+            # Without posted history, simulate from the streaming covariance estimate.
+            weights = {t.upper(): w for t, w in request.weights.items()} if request.weights else None
+            tickers, drift, cov, _ = online_moments(request.covariance_method, list(weights or {}) or None)
+        if not tickers:
+            raise HTTPException(status_code=400, detail="Provide at least two returns per ticker, or stream bars to /covariance/update first")
+        weights = weights or {ticker: 1.0 for ticker in tickers}
+        result = monte_carlo.simulate_covariance(
+            drift,
+            cov,
+            [weights.get(ticker, 0.0) for ticker in tickers],
+            num_paths=request.num_paths,
+            horizon_days=request.horizon_days,
+            confidence=request.confidence,
+            seed=request.seed,
+            volatility_multiplier=request.volatility_multiplier
+        )
+        if request.portfolio_value:
+            result['var_amount'] = round(result['var'] * request.portfolio_value, 2)
+            result['cvar_amount'] = round(result['cvar'] * request.portfolio_value, 2)
+        result['tickers'] = tickers
+        return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/technicals")
+def fit_technicals(request: TechnicalsRequest):
+    try:
+        return technicals.fit(request.closes, request.highs, request.lows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/technicals/update")
+def update_technicals(request: TechnicalsUpdateRequest):
+    try:
+        return technicals.update(request.bar)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/technicals")
+def get_technicals():
+    if not technicals.tickers:
+        raise HTTPException(status_code=404, detail="Indicators have not been fitted yet")
+    return technicals.latest()
+
+@app.get("/snapshots/{portfolio_id}")
+def list_snapshots(portfolio_id: str):
+    return {"portfolio_id": portfolio_id, "dates": snapshots.list_dates(portfolio_id)}
+
+@app.get("/snapshots/{portfolio_id}/diff")
+def diff_snapshots(portfolio_id: str, from_date: Optional[date] = None, to_date: Optional[date] = None):
+    diff = snapshots.diff(portfolio_id, from_date.isoformat() if from_date else None,
+                          to_date.isoformat() if to_date else None)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Need two snapshots to compare")
+    return diff
+
+@app.get("/snapshots/{portfolio_id}/{snapshot_date}")
+def get_snapshot(portfolio_id: str, snapshot_date: date):
+    snapshot = snapshots.get(portfolio_id, snapshot_date.isoformat())
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return snapshot
+
+@app.post("/covariance/update")
+def update_covariance(request: CovarianceUpdateRequest):
+    try:
+        bars = covariance.update_many(request.bars)
+        covariance.save(COVARIANCE_PATH)
+        return {"bars": bars, "tickers": len(covariance.tickers)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/covariance")
+def get_covariance(method: str = "ewma", tickers: Optional[str] = None):
+    ticker_list = [t.strip().upper() for t in tickers.split(",") if t.strip()] if tickers else None
+    try:
+        selected, cov, corr, counts = covariance.covariance(method, ticker_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    clean = lambda matrix: [[None if np.isnan(v) else round(float(v), 8) for v in row] for row in matrix]
+    return {
+        "method": method,
+        "tickers": selected,
+        "bars": covariance.bars,
+        "observations": counts.astype(int).tolist(),
+        "covariance": clean(cov),
+        "correlation": clean(corr)
+    }
+
+@app.delete("/covariance")
+def reset_covariance():
+    covariance.reset()
+    covariance.save(COVARIANCE_PATH)
+    return {"message": "Covariance state cleared"}
+
+@app.on_event("shutdown")
+def shutdown_monte_carlo():
+    monte_carlo.shutdown()
+    covariance.save(COVARIANCE_PATH)
+
+@app.get("/cache/stats")
+def cache_stats():
+    return agent.cache_stats()
+
 @app.get("/")
 def root():
     return {"message": "Portfolio Analysis Service"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8002)
\ No newline at end of file
+    # Relative imports need the package context: python -m agents.analysis_agent.main
+    uvicorn.run("agents.analysis_agent.main:app", host="0.0.0.0", port=8002)
@@ -0,0 +1,14 @@
+import hashlib
+import json
+
+
+def content_digest(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def payload_digest(payload):
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode('utf-8'), digest_size=16).hexdigest()
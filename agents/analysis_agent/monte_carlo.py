@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+CHUNK_PATHS = 20000
+MIN_PARALLEL_PATHS = 50000
+
+
+def attach_shared(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Pool workers share the parent's resource tracker, which already owns the block.
+        return shared_memory.SharedMemory(name=name)
+
+
+def layout(num_assets, num_paths):
+    # Inputs and output share one block: cholesky factor, drift, weights, then path returns.
+    sizes = [num_assets * num_assets, num_assets, num_assets, num_paths]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    return offsets, int(offsets[-1]) * 8
+
+
+def views(buffer, num_assets, num_paths):
+    offsets, _ = layout(num_assets, num_paths)
+    block = np.ndarray((offsets[-1],), dtype=np.float64, buffer=buffer)
+    cholesky = block[offsets[0]:offsets[1]].reshape(num_assets, num_assets)
+    drift = block[offsets[1]:offsets[2]]
+    weights = block[offsets[2]:offsets[3]]
+    path_returns = block[offsets[3]:offsets[4]]
+    return cholesky, drift, weights, path_returns
+
+
+def simulate_chunk(cholesky, drift, weights, out, seed_sequence, horizon_days):
+    rng = np.random.default_rng(seed_sequence)
+    shocks = rng.standard_normal((out.shape[0], cholesky.shape[0]))
+    log_returns = horizon_days * drift + np.sqrt(horizon_days) * shocks @ cholesky.T
+    out[:] = np.expm1(log_returns) @ weights
+
+
+def run_chunk(shm_name, num_assets, num_paths, start, stop, seed_sequence, horizon_days):
+    shm = attach_shared(shm_name)
+    try:
+        cholesky, drift, weights, path_returns = views(shm.buf, num_assets, num_paths)
+        simulate_chunk(cholesky, drift, weights, path_returns[start:stop], seed_sequence, horizon_days)
+        del cholesky, drift, weights, path_returns
+    finally:
+        shm.close()
+    return stop - start
+
+
+def cholesky_factor(covariance):
+    covariance = (covariance + covariance.T) / 2
+    jitter = 0.0
+    scale = max(float(np.mean(np.diag(covariance))), 1e-12)
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(covariance + jitter * np.eye(covariance.shape[0]))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0 else jitter * 100
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+class MonteCarloEngine:
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # Forking the threaded server process can inherit held locks (BLAS included).
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def simulate(self, log_returns, weights, num_paths=100000, horizon_days=1, confidence=0.95,
+                 seed=None, volatility_multiplier=1.0):
+        log_returns = np.asarray(log_returns, dtype=float)
+        return self.simulate_covariance(
+            log_returns.mean(axis=1), np.cov(log_returns), weights, num_paths=num_paths,
+            horizon_days=horizon_days, confidence=confidence, seed=seed,
+            volatility_multiplier=volatility_multiplier
+        )
+
+    def simulate_covariance(self, drift, covariance, weights, num_paths=100000, horizon_days=1, confidence=0.95,
+                            seed=None, volatility_multiplier=1.0):
+        drift = np.asarray(drift, dtype=float)
+        num_assets = drift.shape[0]
+        weights = np.asarray(weights, dtype=float)
+        total = weights.sum()
+        weights = weights / total if total else weights
+
+        covariance = np.atleast_2d(np.asarray(covariance, dtype=float)) * volatility_multiplier ** 2
+        cholesky = cholesky_factor(covariance)
+
+        chunks = [(start, min(start + CHUNK_PATHS, num_paths)) for start in range(0, num_paths, CHUNK_PATHS)]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        parallel = self.workers > 1 and num_paths >= MIN_PARALLEL_PATHS
+
+        start_time = time.perf_counter()
+        _, size = layout(num_assets, num_paths)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            shared_cholesky, shared_drift, shared_weights, path_returns = views(shm.buf, num_assets, num_paths)
+            shared_cholesky[:] = cholesky
+            shared_drift[:] = drift
+            shared_weights[:] = weights
+
+            if parallel:
+                futures = [
+                    self.pool().submit(run_chunk, shm.name, num_assets, num_paths, start, stop, chunk_seed, horizon_days)
+                    for (start, stop), chunk_seed in zip(chunks, seeds)
+                ]
+                for future in futures:
+                    future.result()
+            else:
+                for (start, stop), chunk_seed in zip(chunks, seeds):
+                    simulate_chunk(cholesky, drift, weights, path_returns[start:stop], chunk_seed, horizon_days)
+
+            outcomes = np.array(path_returns)
+            del shared_cholesky, shared_drift, shared_weights, path_returns
+        finally:
+            shm.close()
+            shm.unlink()
+        elapsed = time.perf_counter() - start_time
+
+        threshold = np.quantile(outcomes, 1 - confidence)
+        tail = outcomes[outcomes <= threshold]
+        return {
+            'var': float(-threshold),
+            'cvar': float(-tail.mean()) if tail.size else float(-threshold),
+            'expected_return': float(outcomes.mean()),
+            'worst_path_return': float(outcomes.min()),
+            'best_path_return': float(outcomes.max()),
+            'num_paths': num_paths,
+            'horizon_days': horizon_days,
+            'confidence': confidence,
+            'seed': seed,
+            'workers': self.workers if parallel else 1,
+            'seconds': round(elapsed, 4),
+            'paths_per_sec': round(num_paths / elapsed, 1) if elapsed > 0 else None
+        }
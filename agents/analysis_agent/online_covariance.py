@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+COVARIANCE_METHODS = ('welford', 'ewma')
+
+
+# Welford co-moments are kept pairwise, so tickers that join late or skip a bar
+# only contribute the observations they share with each other. The EWMA estimate
+# follows the RiskMetrics zero-mean recursion with decay ``lam``.
+class OnlineCovariance:
+    def __init__(self, lam=0.94):
+        self.lam = lam
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.tickers = []
+        self.positions = {}
+        self.bars = 0
+        self.counts = np.zeros((0, 0))
+        self.means = np.zeros((0, 0))
+        self.comoments = np.zeros((0, 0))
+        self.ewma = np.zeros((0, 0))
+
+    def _grow(self, new_tickers):
+        extra = len(new_tickers)
+        size = len(self.tickers) + extra
+        for name in ('counts', 'means', 'comoments', 'ewma'):
+            grown = np.zeros((size, size))
+            old = getattr(self, name)
+            grown[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, grown)
+        for ticker in new_tickers:
+            self.positions[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+
+    def update(self, bar):
+        # Tickers are stored upper-case, matching how GET /covariance normalizes its query.
+        bar = {str(ticker).upper(): value for ticker, value in bar.items()}
+        with self.lock:
+            new_tickers = [t for t in bar if t not in self.positions]
+            if new_tickers:
+                self._grow(new_tickers)
+
+            x = np.full(len(self.tickers), np.nan)
+            for ticker, value in bar.items():
+                if value is not None:
+                    x[self.positions[ticker]] = value
+            observed = ~np.isnan(x)
+            pair = observed[:, None] & observed[None, :]
+            values = np.where(observed, x, 0.0)
+
+            self.counts += pair
+            row_values = values[:, None]
+            delta = np.where(pair, row_values - self.means, 0.0)
+            self.means += np.divide(delta, self.counts, out=np.zeros_like(delta), where=pair)
+            self.comoments += np.where(pair, delta * (values[None, :] - self.means.T), 0.0)
+
+            outer = np.outer(values, values)
+            self.ewma = np.where(pair, self.lam * self.ewma + (1 - self.lam) * outer, self.ewma)
+            # A ticker's first EWMA observation seeds the estimate instead of decaying from zero.
+            first = pair & (self.counts == 1)
+            self.ewma[first] = outer[first]
+            self.bars += 1
+
+    def update_many(self, bars):
+        for bar in bars:
+            self.update(bar)
+        return self.bars
+
+    def covariance(self, method='welford', tickers=None):
+        if method not in COVARIANCE_METHODS:
+            raise ValueError(f"Unknown covariance method '{method}'. Available: {', '.join(COVARIANCE_METHODS)}")
+        with self.lock:
+            selected = [t.upper() for t in (tickers or self.tickers) if t.upper() in self.positions]
+            idx = [self.positions[t] for t in selected]
+            counts = self.counts[np.ix_(idx, idx)]
+            if method == 'ewma':
+                cov = np.where(counts > 0, self.ewma[np.ix_(idx, idx)], np.nan)
+            else:
+                comoments = self.comoments[np.ix_(idx, idx)]
+                cov = np.divide(comoments, counts - 1, out=np.full(comoments.shape, np.nan), where=counts > 1)
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        return selected, cov, np.clip(corr, -1, 1), counts
+
+    def mean(self, tickers):
+        # The diagonal of the pairwise means is each ticker's mean over all of its own bars.
+        with self.lock:
+            idx = [self.positions[t.upper()] for t in tickers]
+            return self.means[idx, idx].copy()
+
+    def save(self, path):
+        with self.lock:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+            os.close(fd)
+            np.savez(
+                tmp_path, tickers=np.array(self.tickers, dtype=str), bars=self.bars, lam=self.lam,
+                counts=self.counts, means=self.means, comoments=self.comoments, ewma=self.ewma
+            )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, lam=0.94):
+        estimator = cls(lam)
+        if not os.path.exists(path):
+            return estimator
+        with np.load(path) as state:
+            estimator.tickers = [str(t) for t in state['tickers']]
+            estimator.positions = {t: i for i, t in enumerate(estimator.tickers)}
+            estimator.bars = int(state['bars'])
+            saved_lam = float(state['lam'])
+            if saved_lam != lam:
+                # The configured decay wins; the saved EWMA state keeps decaying from here at the new rate.
+                print(f"Covariance state at {path} was built with decay {saved_lam}; continuing with {lam}")
+            estimator.counts = state['counts']
+            estimator.means = state['means']
+            estimator.comoments = state['comoments']
+            estimator.ewma = state['ewma']
+        return estimator
@@ -0,0 +1,142 @@
+from statistics import NormalDist
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def align_series(series_by_ticker):
+    tickers = [t for t, values in series_by_ticker.items() if values is not None and len(values) > 1]
+    if not tickers:
+        return [], np.zeros((0, 0))
+    window = min(len(series_by_ticker[t]) for t in tickers)
+    matrix = np.array([np.asarray(series_by_ticker[t], dtype=float)[-window:] for t in tickers])
+    return tickers, matrix
+
+
+def prices_to_returns(prices):
+    prices = np.asarray(prices, dtype=float)
+    return prices[..., 1:] / prices[..., :-1] - 1
+
+
+def historical_var(returns, confidence=0.95):
+    return -np.quantile(returns, 1 - confidence, axis=-1)
+
+
+def historical_cvar(returns, confidence=0.95):
+    threshold = np.quantile(returns, 1 - confidence, axis=-1)[..., None]
+    tail = returns <= threshold
+    return -(returns * tail).sum(axis=-1) / np.maximum(tail.sum(axis=-1), 1)
+
+
+def parametric_var(returns, confidence=0.95):
+    z = NormalDist().inv_cdf(1 - confidence)
+    return -(returns.mean(axis=-1) + z * returns.std(axis=-1, ddof=1))
+
+
+def parametric_cvar(returns, confidence=0.95):
+    z = NormalDist().inv_cdf(1 - confidence)
+    tail_density = NormalDist().pdf(z) / (1 - confidence)
+    return -(returns.mean(axis=-1) - returns.std(axis=-1, ddof=1) * tail_density)
+
+
+def annualized_volatility(returns, periods=TRADING_DAYS):
+    return returns.std(axis=-1, ddof=1) * np.sqrt(periods)
+
+
+def sharpe_ratio(returns, risk_free_rate=0.0, periods=TRADING_DAYS):
+    volatility = annualized_volatility(returns, periods)
+    excess = returns.mean(axis=-1) * periods - risk_free_rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(volatility > 0, excess / volatility, np.nan)
+
+
+def beta(returns, benchmark):
+    benchmark = np.asarray(benchmark, dtype=float)[-returns.shape[-1]:]
+    returns = returns[..., -benchmark.shape[0]:]
+    centered_benchmark = benchmark - benchmark.mean()
+    variance = centered_benchmark @ centered_benchmark
+    if variance == 0:
+        return np.full(returns.shape[:-1], np.nan)
+    centered = returns - returns.mean(axis=-1, keepdims=True)
+    return centered @ centered_benchmark / variance
+
+
+def compute_risk_metrics(returns, confidence=0.95, risk_free_rate=0.0, benchmark=None, horizon_days=1):
+    scale = np.sqrt(horizon_days)
+    metrics = {
+        'historical_var': historical_var(returns, confidence) * scale,
+        'historical_cvar': historical_cvar(returns, confidence) * scale,
+        'parametric_var': parametric_var(returns, confidence) * scale,
+        'parametric_cvar': parametric_cvar(returns, confidence) * scale,
+        'volatility': annualized_volatility(returns),
+        'sharpe_ratio': sharpe_ratio(returns, risk_free_rate)
+    }
+    if benchmark is not None and len(benchmark) > 1:
+        metrics['beta'] = beta(returns, benchmark)
+    return metrics
+
+
+def rows_to_dicts(names, metrics):
+    rounded = {key: np.round(values, 4).tolist() for key, values in metrics.items()}
+    return {
+        name: {key: (None if np.isnan(values[i]) else values[i]) for key, values in rounded.items()}
+        for i, name in enumerate(names)
+    }
+
+
+def analyze_risk(returns_by_ticker, portfolios=None, benchmark_returns=None, confidence=0.95,
+                 risk_free_rate=0.0, horizon_days=1):
+    tickers, returns = align_series(returns_by_ticker)
+    if not tickers:
+        return {'holdings': {}, 'portfolios': {}, 'observations': 0}
+
+    names = list(portfolios or {})
+    weights = np.array([[portfolios[name].get(t, 0.0) for t in tickers] for name in names]).reshape(len(names), len(tickers))
+    totals = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals != 0)
+
+    # Holdings and portfolios are stacked so every metric is one vectorized pass.
+    stacked = np.vstack([returns, weights @ returns])
+    metrics = compute_risk_metrics(stacked, confidence, risk_free_rate, benchmark_returns, horizon_days)
+
+    holding_metrics = {key: values[:len(tickers)] for key, values in metrics.items()}
+    portfolio_metrics = {key: values[len(tickers):] for key, values in metrics.items()}
+    return {
+        'holdings': rows_to_dicts(tickers, holding_metrics),
+        'portfolios': rows_to_dicts(names, portfolio_metrics),
+        'observations': int(returns.shape[1]),
+        'confidence': confidence,
+        'horizon_days': horizon_days
+    }
+
+
+def covariance_risk(tickers, covariance, drift=None, portfolios=None, confidence=0.95, horizon_days=1,
+                    observations=0):
+    # Parametric metrics straight from a maintained covariance matrix; no return history is needed.
+    drift = np.zeros(len(tickers)) if drift is None else np.asarray(drift, dtype=float)
+    names = list(portfolios or {})
+    weights = np.array([[portfolios[name].get(t, 0.0) for t in tickers] for name in names]).reshape(len(names), len(tickers))
+    totals = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals != 0)
+
+    stacked = np.vstack([np.eye(len(tickers)), weights])
+    means = stacked @ drift
+    std = np.sqrt(np.clip(np.einsum('ij,jk,ik->i', stacked, covariance, stacked), 0, None))
+    z = NormalDist().inv_cdf(1 - confidence)
+    tail_density = NormalDist().pdf(z) / (1 - confidence)
+    scale = np.sqrt(horizon_days)
+    metrics = {
+        'parametric_var': -(means + z * std) * scale,
+        'parametric_cvar': -(means - std * tail_density) * scale,
+        'volatility': std * np.sqrt(TRADING_DAYS)
+    }
+    holding_metrics = {key: values[:len(tickers)] for key, values in metrics.items()}
+    portfolio_metrics = {key: values[len(tickers):] for key, values in metrics.items()}
+    return {
+        'holdings': rows_to_dicts(tickers, holding_metrics),
+        'portfolios': rows_to_dicts(names, portfolio_metrics),
+        'observations': observations,
+        'confidence': confidence,
+        'horizon_days': horizon_days
+    }
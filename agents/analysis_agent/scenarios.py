@@ -0,0 +1,134 @@
+import numpy as np
+
+from .batch import concentration_levels, one_hot, universe_frame
+
+
+def unmatched_shocks(scenarios, tickers, sectors, factor_exposures=None):
+    # A shock keyed to a name outside the universe would otherwise be dropped without a trace.
+    universe = set(tickers)
+    known = {
+        'sector_shocks': set(sectors),
+        'ticker_shocks': universe,
+        'factor_shocks': {f for t, betas in (factor_exposures or {}).items() if t in universe for f in betas}
+    }
+    problems = []
+    for s, scenario in enumerate(scenarios):
+        missing = {
+            kind: sorted(set(scenario.get(kind) or {}) - names) for kind, names in known.items()
+        }
+        missing = {kind: keys for kind, keys in missing.items() if keys}
+        if missing:
+            name = scenario.get('name') or f"scenario_{s}"
+            problems.append(f"{name}: " + "; ".join(f"{kind} {', '.join(keys)}" for kind, keys in missing.items()))
+    return problems
+
+
+def shock_matrix(scenarios, tickers, sectors, factor_exposures=None):
+    # Market, sector and factor shocks add up per ticker; an explicit ticker shock replaces the sum.
+    problems = unmatched_shocks(scenarios, tickers, sectors, factor_exposures)
+    if problems:
+        raise ValueError("Scenario shocks match nothing in the portfolio: " + " | ".join(problems))
+    positions = {ticker: i for i, ticker in enumerate(tickers)}
+    factors = sorted({f for scenario in scenarios for f in (scenario.get('factor_shocks') or {})})
+    factor_positions = {factor: j for j, factor in enumerate(factors)}
+    exposures = np.zeros((len(tickers), len(factors)))
+    for ticker, betas in (factor_exposures or {}).items():
+        if ticker in positions:
+            for factor, value in betas.items():
+                if factor in factor_positions:
+                    exposures[positions[ticker], factor_positions[factor]] = value
+
+    sector_index = {sector: k for k, sector in enumerate(sectors)}
+    num_scenarios = len(scenarios)
+    market = np.zeros(num_scenarios)
+    sector_shocks = np.zeros((num_scenarios, len(sectors)))
+    factor_shocks = np.zeros((num_scenarios, len(factors)))
+    overrides = np.full((num_scenarios, len(tickers)), np.nan)
+    for s, scenario in enumerate(scenarios):
+        market[s] = scenario.get('market_shock') or 0.0
+        for sector, value in (scenario.get('sector_shocks') or {}).items():
+            sector_shocks[s, sector_index[sector]] = value
+        for factor, value in (scenario.get('factor_shocks') or {}).items():
+            factor_shocks[s, factor_positions[factor]] = value
+        for ticker, value in (scenario.get('ticker_shocks') or {}).items():
+            overrides[s, positions[ticker]] = value
+    return market, sector_shocks, factor_shocks, exposures, overrides
+
+
+def run_scenarios(stocks, scenarios, tickers=None, weights=None, portfolio_ids=None,
+                  weight_type='quantity', factor_exposures=None):
+    if tickers is None:
+        tickers = [stock['ticker'] for stock in stocks if stock.get('ticker')]
+    if weights is None:
+        weights = [[1.0] * len(tickers)]
+        weight_type = 'quantity'
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim != 2 or weights.shape[1] != len(tickers):
+        raise ValueError(f"weights must be a portfolios x {len(tickers)} matrix matching tickers")
+    portfolio_ids = portfolio_ids or [str(i) for i in range(weights.shape[0])]
+    if len(portfolio_ids) != weights.shape[0]:
+        raise ValueError("portfolio_ids must have one entry per weight vector")
+
+    universe = universe_frame(stocks, tickers)
+    values = weights * universe['price'].to_numpy() if weight_type == 'quantity' else weights.copy()
+    values[:, ~universe['priced'].to_numpy()] = 0.0
+    totals = values.sum(axis=1)
+
+    sector_onehot, sectors = one_hot(universe['sector'].tolist())
+    market, sector_shocks, factor_shocks, exposures, overrides = shock_matrix(
+        scenarios, tickers, sectors, factor_exposures
+    )
+    # scenarios x tickers returns, one broadcast over every shock source
+    returns = market[:, None] + sector_shocks @ sector_onehot.T + factor_shocks @ exposures.T
+    returns = np.where(np.isnan(overrides), returns, overrides)
+    returns = np.maximum(returns, -1.0)
+
+    pnl = values @ returns.T
+    # Post-shock sector values (portfolios x scenarios x sectors) without materialising the
+    # full portfolios x scenarios x tickers cube.
+    growth = 1.0 + returns
+    post_sector = np.stack(
+        [values[:, members] @ growth[:, members].T for members in sector_onehot.T.astype(bool)], axis=-1
+    ) if sectors else np.zeros((len(portfolio_ids), len(scenarios), 0))
+    post_totals = totals[:, None] + pnl
+    post_pct = np.divide(post_sector * 100, post_totals[..., None], out=np.zeros_like(post_sector),
+                         where=post_totals[..., None] > 0)
+    concentration = post_pct.max(axis=-1) if sectors else np.zeros(pnl.shape)
+    dominant = post_pct.argmax(axis=-1) if sectors else np.zeros(pnl.shape, dtype=int)
+    levels = concentration_levels(np.round(concentration, 1))
+    pnl_pct = np.divide(pnl * 100, totals[:, None], out=np.zeros_like(pnl), where=totals[:, None] > 0)
+
+    names = [scenario.get('name') or f"scenario_{s}" for s, scenario in enumerate(scenarios)]
+    worst = pnl.argmin(axis=1) if names else np.zeros(len(portfolio_ids), dtype=int)
+    results = []
+    for p, portfolio_id in enumerate(portfolio_ids):
+        rows = zip(names, np.round(pnl[p], 2).tolist(), np.round(pnl_pct[p], 2).tolist(),
+                   np.round(post_totals[p], 2).tolist(), np.round(concentration[p], 1).tolist(),
+                   dominant[p].tolist(), levels[p].tolist())
+        results.append({
+            'portfolio_id': portfolio_id,
+            'total_value': round(float(totals[p]), 2),
+            'worst_scenario': names[worst[p]] if names else None,
+            'scenarios': [
+                {
+                    'scenario': name,
+                    'pnl': gain,
+                    'pnl_percentage': gain_pct,
+                    'post_shock_value': post_value,
+                    'post_shock_concentration': {
+                        'risk_level': level if post_value > 0 else 'LOW',
+                        'dominant_sector': sectors[sector] if post_value > 0 else None,
+                        'concentration_percentage': pct
+                    }
+                }
+                for name, gain, gain_pct, post_value, pct, sector, level in rows
+            ]
+        })
+
+    return {
+        'tickers': list(tickers),
+        'sectors': sectors,
+        'scenario_count': len(names),
+        'portfolio_count': len(portfolio_ids),
+        'portfolios': results
+    }
@@ -0,0 +1,148 @@
+import bisect
+import json
+import os
+import threading
+
+
+def compact_allocation(result):
+    overview = result['portfolio_overview']
+    return {
+        'total_value': overview['total_value'],
+        'sector_allocation': {k: v['allocation_percentage'] for k, v in overview['sector_allocation'].items()},
+        'region_allocation': {k: v['allocation_percentage'] for k, v in overview['region_allocation'].items()}
+    }
+
+
+def compact_snapshot(result):
+    risk = result['risk_assessment']
+    portfolio_metrics = (risk.get('risk_metrics') or {}).get('portfolio') or {}
+    return {
+        **compact_allocation(result),
+        'risk': {
+            'risk_level': risk['risk_level'],
+            'dominant_sector': risk['dominant_sector'],
+            'concentration_percentage': risk.get('concentration_percentage', 0),
+            'historical_var': portfolio_metrics.get('historical_var')
+        },
+        'sentiment': result['market_intelligence']['sentiment_breakdown']
+    }
+
+
+def allocation_deltas(before, after):
+    keys = sorted(set(before) | set(after))
+    return {
+        key: {
+            'previous': before.get(key, 0.0),
+            'current': after.get(key, 0.0),
+            'change': round(after.get(key, 0.0) - before.get(key, 0.0), 1)
+        }
+        for key in keys
+    }
+
+
+def snapshot_diff(before, after):
+    # `after` may be an allocation-only view of the current analysis, in which case the
+    # risk and sentiment comparisons are left out.
+    diff = {
+        'from_date': before['date'],
+        'to_date': after['date'],
+        'total_value': {
+            'previous': before['total_value'],
+            'current': after['total_value'],
+            'change': round(after['total_value'] - before['total_value'], 2)
+        },
+        'sector_allocation': allocation_deltas(before['sector_allocation'], after['sector_allocation']),
+        'region_allocation': allocation_deltas(before['region_allocation'], after['region_allocation'])
+    }
+    if 'risk' in after:
+        diff['risk'] = {'previous': before['risk'], 'current': after['risk']}
+    if 'sentiment' in after:
+        diff['sentiment'] = {
+            key: after['sentiment'].get(key, 0) - before['sentiment'].get(key, 0)
+            for key in set(before['sentiment']) | set(after['sentiment'])
+        }
+    return diff
+
+
+# Snapshots are appended as "portfolio_id<TAB>date<TAB>json" lines. The index maps each
+# portfolio's dates (kept sorted) to the byte offset of the latest line written for that
+# date, so rewriting a day appends rather than edits and lookups are a seek plus one parse.
+class SnapshotStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.offsets = {}
+        self.dates = {}
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as handle:
+            offset = 0
+            for line in handle:
+                parts = line.split(b'\t', 2)
+                if len(parts) == 3 and line.endswith(b'\n'):
+                    self._index(parts[0].decode(), parts[1].decode(), offset)
+                offset += len(line)
+
+    def _index(self, portfolio_id, date, offset):
+        dates = self.dates.setdefault(portfolio_id, [])
+        if (portfolio_id, date) not in self.offsets:
+            bisect.insort(dates, date)
+        self.offsets[(portfolio_id, date)] = offset
+
+    def record(self, portfolio_id, date, snapshot):
+        if '\t' in portfolio_id or '\n' in portfolio_id:
+            raise ValueError("portfolio_id may not contain tabs or newlines")
+        line = f"{portfolio_id}\t{date}\t{json.dumps(snapshot, separators=(',', ':'))}\n".encode()
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'ab') as handle:
+                offset = handle.seek(0, os.SEEK_END)
+                handle.write(line)
+            self._index(portfolio_id, date, offset)
+
+    def get(self, portfolio_id, date):
+        with self.lock:
+            offset = self.offsets.get((portfolio_id, date))
+            if offset is None:
+                return None
+            with open(self.path, 'rb') as handle:
+                handle.seek(offset)
+                line = handle.readline()
+        snapshot = json.loads(line.split(b'\t', 2)[2])
+        snapshot['date'] = date
+        return snapshot
+
+    def list_dates(self, portfolio_id):
+        with self.lock:
+            return list(self.dates.get(portfolio_id, []))
+
+    def previous_date(self, portfolio_id, date):
+        with self.lock:
+            dates = self.dates.get(portfolio_id, [])
+            i = bisect.bisect_left(dates, date)
+            return dates[i - 1] if i > 0 else None
+
+    def latest_date(self, portfolio_id, on_or_before=None):
+        with self.lock:
+            dates = self.dates.get(portfolio_id, [])
+            i = bisect.bisect_right(dates, on_or_before) if on_or_before else len(dates)
+            return dates[i - 1] if i > 0 else None
+
+    def diff(self, portfolio_id, from_date=None, to_date=None):
+        to_date = self.latest_date(portfolio_id, to_date)
+        if to_date is None:
+            return None
+        from_date = self.latest_date(portfolio_id, from_date) if from_date else self.previous_date(portfolio_id, to_date)
+        if from_date is None:
+            return None
+        return snapshot_diff(self.get(portfolio_id, from_date), self.get(portfolio_id, to_date))
+
+    def compare(self, portfolio_id, current, as_of):
+        # Read-only: diffs a live (possibly partial) snapshot against the last one stored before as_of.
+        from_date = self.previous_date(portfolio_id, as_of)
+        if from_date is None:
+            return None
+        return snapshot_diff(self.get(portfolio_id, from_date), {**current, 'date': as_of})
@@ -0,0 +1,230 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .risk_metrics import align_series
+
+SMA_WINDOW = 20
+EMA_FAST = 12
+EMA_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_STDS = 2.0
+
+
+def ewm(matrix, alpha):
+    # pandas runs the recursion in C across every column at once (time x tickers).
+    return pd.DataFrame(matrix.T).ewm(alpha=alpha, adjust=False).mean().to_numpy().T
+
+
+def span_alpha(span):
+    return 2.0 / (span + 1)
+
+
+def sma(closes, window=SMA_WINDOW):
+    cumulative = np.cumsum(np.pad(closes, ((0, 0), (1, 0))), axis=1)
+    out = np.full(closes.shape, np.nan)
+    out[:, window - 1:] = (cumulative[:, window:] - cumulative[:, :-window]) / window
+    return out
+
+
+def rolling_std(closes, window=SMA_WINDOW):
+    mean = sma(closes, window)
+    mean_sq = sma(closes ** 2, window)
+    return np.sqrt(np.clip(mean_sq - mean ** 2, 0, None))
+
+
+def true_range(closes, highs=None, lows=None):
+    # Rows whose highs/lows are NaN fall back to the close-to-close range.
+    previous = np.concatenate([closes[:, :1], closes[:, :-1]], axis=1)
+    if highs is None or lows is None:
+        return np.abs(closes - previous)
+    has_range = ~np.isnan(highs) & ~np.isnan(lows)
+    full = np.fmax.reduce([highs - lows, np.abs(highs - previous), np.abs(lows - previous)])
+    return np.where(has_range, full, np.abs(closes - previous))
+
+
+def bar_value(ticker, value, field):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Bar for {ticker} has a non-numeric {field}: {value!r}")
+
+
+def compute_indicators(closes, highs=None, lows=None):
+    closes = np.asarray(closes, dtype=float)
+    ema_fast = ewm(closes, span_alpha(EMA_FAST))
+    ema_slow = ewm(closes, span_alpha(EMA_SLOW))
+    macd = ema_fast - ema_slow
+    macd_signal = ewm(macd, span_alpha(MACD_SIGNAL))
+
+    change = np.diff(closes, axis=1, prepend=closes[:, :1])
+    avg_gain = ewm(np.clip(change, 0, None), 1.0 / RSI_PERIOD)
+    avg_loss = ewm(np.clip(-change, 0, None), 1.0 / RSI_PERIOD)
+
+    middle = sma(closes)
+    width = BOLLINGER_STDS * rolling_std(closes)
+    return {
+        'close': closes,
+        'sma': middle,
+        'ema_fast': ema_fast,
+        'ema_slow': ema_slow,
+        'macd': macd,
+        'macd_signal': macd_signal,
+        'avg_gain': avg_gain,
+        'avg_loss': avg_loss,
+        'rsi': rsi_from_averages(avg_gain, avg_loss),
+        'bollinger_upper': middle + width,
+        'bollinger_lower': middle - width,
+        'atr': ewm(true_range(closes, highs, lows), 1.0 / ATR_PERIOD)
+    }
+
+
+def rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), 100 - 100 / (1 + rs))
+
+
+def classify_signals(latest):
+    close, middle = latest['close'], latest['sma']
+    above_trend = (close > middle) & (latest['macd'] > latest['macd_signal'])
+    below_trend = (close < middle) & (latest['macd'] < latest['macd_signal'])
+    return {
+        'trend': np.select([above_trend, below_trend], ['bullish', 'bearish'], default='neutral'),
+        'momentum': np.select([latest['rsi'] > 70, latest['rsi'] < 30], ['overbought', 'oversold'], default='neutral'),
+        'bollinger': np.select(
+            [close > latest['bollinger_upper'], close < latest['bollinger_lower']], ['above_upper', 'below_lower'],
+            default='inside'
+        )
+    }
+
+
+def technical_insights(tickers, latest, signals):
+    tickers = np.asarray(tickers)
+    groups = [
+        (signals['trend'] == 'bullish', "Bullish trend (price above 20-day SMA, MACD above signal)"),
+        (signals['trend'] == 'bearish', "Bearish trend (price below 20-day SMA, MACD below signal)"),
+        (signals['momentum'] == 'overbought', "Overbought momentum (RSI above 70)"),
+        (signals['momentum'] == 'oversold', "Oversold momentum (RSI below 30)"),
+        (signals['bollinger'] == 'above_upper', "Trading above upper Bollinger band"),
+        (signals['bollinger'] == 'below_lower', "Trading below lower Bollinger band")
+    ]
+    return [f"{label}: {', '.join(tickers[mask].tolist())}" for mask, label in groups if mask.any()]
+
+
+# Keeps only the last value of each recursive indicator plus a ring buffer of the
+# last SMA_WINDOW closes (with running sum and sum of squares), so a new bar costs
+# O(1) per ticker and is applied to every ticker in one vectorized step.
+class TechnicalIndicators:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.tickers = []
+        self.positions = {}
+        self.state = {}
+        self.window = np.zeros((0, SMA_WINDOW))
+        self.cursor = 0
+        self.bars = 0
+
+    def fit(self, closes_by_ticker, highs_by_ticker=None, lows_by_ticker=None):
+        tickers, closes = align_series(closes_by_ticker)
+        if not tickers or closes.shape[1] < SMA_WINDOW:
+            raise ValueError(f"Need at least {SMA_WINDOW} aligned closes per ticker")
+        window = closes.shape[1]
+        highs = np.full(closes.shape, np.nan)
+        lows = np.full(closes.shape, np.nan)
+        close_only = []
+        for i, ticker in enumerate(tickers):
+            high = (highs_by_ticker or {}).get(ticker)
+            low = (lows_by_ticker or {}).get(ticker)
+            if high is None or low is None or min(len(high), len(low)) < window:
+                close_only.append(ticker)
+                continue
+            highs[i] = np.asarray(high, dtype=float)[-window:]
+            lows[i] = np.asarray(low, dtype=float)[-window:]
+        indicators = compute_indicators(closes, highs, lows)
+        with self.lock:
+            self.tickers = tickers
+            self.positions = {t: i for i, t in enumerate(tickers)}
+            self.state = {name: values[:, -1].copy() for name, values in indicators.items()}
+            self.window = closes[:, -SMA_WINDOW:].copy()
+            self.state['window_sum'] = self.window.sum(axis=1)
+            self.state['window_sumsq'] = (self.window ** 2).sum(axis=1)
+            self.cursor = 0
+            self.bars = closes.shape[1]
+        # Tickers without a full high/low history get a close-to-close ATR.
+        return {**self.latest(), 'close_only_atr': close_only}
+
+    def update(self, bar):
+        with self.lock:
+            if not self.tickers:
+                raise ValueError("Indicators have not been fitted yet")
+            s = self.state
+            close = s['close'].copy()
+            high = np.full(len(self.tickers), np.nan)
+            low = np.full(len(self.tickers), np.nan)
+            for ticker, value in bar.items():
+                i = self.positions.get(ticker)
+                if i is None or value is None:
+                    continue
+                if isinstance(value, dict):
+                    if value.get('close') is None:
+                        raise ValueError(f"Bar for {ticker} needs a 'close' value")
+                    close[i] = bar_value(ticker, value['close'], 'close')
+                    for field, target in (('high', high), ('low', low)):
+                        if value.get(field) is not None:
+                            target[i] = bar_value(ticker, value[field], field)
+                else:
+                    close[i] = bar_value(ticker, value, 'close')
+            previous = s['close']
+            has_range = ~np.isnan(high) & ~np.isnan(low)
+            tr = np.where(has_range, np.fmax.reduce([high - low, np.abs(high - previous), np.abs(low - previous)]),
+                          np.abs(close - previous))
+
+            oldest = self.window[:, self.cursor].copy()
+            self.window[:, self.cursor] = close
+            self.cursor = (self.cursor + 1) % SMA_WINDOW
+            s['window_sum'] += close - oldest
+            s['window_sumsq'] += close ** 2 - oldest ** 2
+            s['sma'] = s['window_sum'] / SMA_WINDOW
+            width = BOLLINGER_STDS * np.sqrt(np.clip(s['window_sumsq'] / SMA_WINDOW - s['sma'] ** 2, 0, None))
+            s['bollinger_upper'] = s['sma'] + width
+            s['bollinger_lower'] = s['sma'] - width
+
+            fast, slow, signal = span_alpha(EMA_FAST), span_alpha(EMA_SLOW), span_alpha(MACD_SIGNAL)
+            s['ema_fast'] += fast * (close - s['ema_fast'])
+            s['ema_slow'] += slow * (close - s['ema_slow'])
+            s['macd'] = s['ema_fast'] - s['ema_slow']
+            s['macd_signal'] += signal * (s['macd'] - s['macd_signal'])
+
+            change = close - previous
+            s['avg_gain'] += (np.clip(change, 0, None) - s['avg_gain']) / RSI_PERIOD
+            s['avg_loss'] += (np.clip(-change, 0, None) - s['avg_loss']) / RSI_PERIOD
+            s['rsi'] = rsi_from_averages(s['avg_gain'], s['avg_loss'])
+            s['atr'] += (tr - s['atr']) / ATR_PERIOD
+            s['close'] = close
+            self.bars += 1
+        return self.latest()
+
+    def latest(self):
+        exported = ('close', 'sma', 'ema_fast', 'ema_slow', 'macd', 'macd_signal', 'rsi',
+                    'bollinger_upper', 'bollinger_lower', 'atr')
+        latest = {name: self.state[name] for name in exported}
+        signals = classify_signals(latest)
+        rounded = {name: np.round(values, 4).tolist() for name, values in latest.items()}
+        return {
+            'bars': self.bars,
+            'indicators': {
+                ticker: {
+                    **{name: values[i] for name, values in rounded.items()},
+                    **{name: str(values[i]) for name, values in signals.items()}
+                }
+                for i, ticker in enumerate(self.tickers)
+            },
+            'insights': technical_insights(self.tickers, latest, signals)
+        }
@@ -0,0 +1,148 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+COUNTRY_REGIONS = {
+    'United States': 'North America', 'Canada': 'North America', 'Mexico': 'North America',
+    'Taiwan': 'Asia', 'China': 'Asia', 'Hong Kong': 'Asia', 'Japan': 'Asia', 'South Korea': 'Asia',
+    'India': 'Asia', 'Singapore': 'Asia', 'Indonesia': 'Asia', 'Malaysia': 'Asia', 'Thailand': 'Asia',
+    'United Kingdom': 'Europe', 'Germany': 'Europe', 'France': 'Europe', 'Netherlands': 'Europe',
+    'Switzerland': 'Europe', 'Ireland': 'Europe', 'Sweden': 'Europe', 'Denmark': 'Europe', 'Spain': 'Europe',
+    'Italy': 'Europe', 'Australia': 'Oceania', 'Brazil': 'Latin America'
+}
+
+CURRENCY_REGIONS = {
+    'USD': 'North America', 'CAD': 'North America', 'TWD': 'Asia', 'CNY': 'Asia', 'HKD': 'Asia',
+    'JPY': 'Asia', 'KRW': 'Asia', 'INR': 'Asia', 'SGD': 'Asia', 'EUR': 'Europe', 'GBP': 'Europe',
+    'CHF': 'Europe', 'AUD': 'Oceania', 'BRL': 'Latin America'
+}
+
+
+def quotes_frame(stocks):
+    frame = pd.DataFrame(stocks or [])
+    if frame.empty or 'price' not in frame or 'ticker' not in frame:
+        return pd.DataFrame(columns=['ticker', 'price', 'currency', 'sector', 'region'])
+    frame['price'] = pd.to_numeric(frame['price'], errors='coerce')
+    frame = frame[frame['price'] > 0]
+    frame['sector'] = frame['sector'] if 'sector' in frame else 'Unclassified'
+    frame['sector'] = frame['sector'].fillna('Unclassified')
+    frame['currency'] = frame['currency'].fillna('USD') if 'currency' in frame else 'USD'
+    country = frame['country'] if 'country' in frame else pd.Series(np.nan, index=frame.index)
+    frame['region'] = country.map(COUNTRY_REGIONS).fillna(frame['currency'].map(CURRENCY_REGIONS)).fillna('Other')
+    return frame.drop_duplicates('ticker', keep='last')[['ticker', 'price', 'currency', 'sector', 'region']]
+
+
+def positions_frame(quotes, holdings):
+    if holdings is None:
+        return quotes.assign(quantity=1.0, cost_basis=np.nan, cost_currency=quotes['currency'])
+
+    held = pd.DataFrame(holdings, columns=['ticker', 'quantity', 'cost_basis', 'currency'])
+    held['quantity'] = pd.to_numeric(held['quantity'], errors='coerce').fillna(0.0)
+    held['cost_total'] = held['quantity'] * pd.to_numeric(held['cost_basis'], errors='coerce')
+    by_ticker = held.groupby('ticker', sort=False)
+    aggregated = pd.DataFrame({
+        'quantity': by_ticker['quantity'].sum(),
+        'cost_total': by_ticker['cost_total'].sum(min_count=1),
+        'holding_currency': by_ticker['currency'].first()
+    }).reset_index()
+    aggregated['cost_basis'] = aggregated['cost_total'] / aggregated['quantity'].where(aggregated['quantity'] != 0)
+
+    # Prices stay in the quote's currency; a holding's currency only says what its cost basis is in.
+    positions = quotes.merge(aggregated.drop(columns='cost_total'), on='ticker', how='inner')
+    positions['cost_currency'] = positions['holding_currency'].fillna(positions['currency'])
+    return positions.drop(columns='holding_currency')
+
+
+def allocation_table(positions, key, total):
+    codes, names = pd.factorize(positions[key], sort=False)
+    values = np.bincount(codes, weights=positions['market_value'].to_numpy(), minlength=len(names))
+    counts = np.bincount(codes, minlength=len(names))
+    order = np.argsort(codes, kind='stable')
+    tickers = np.split(positions['ticker'].to_numpy()[order], np.cumsum(counts)[:-1])
+    percentages = values / total * 100 if total > 0 else np.zeros(len(names))
+    return {
+        name: {
+            'allocation_percentage': round(float(pct), 1),
+            'number_of_holdings': int(count),
+            'holdings': group.tolist(),
+            'value': round(float(value), 2)
+        }
+        for name, pct, count, group, value in zip(names, percentages, counts, tickers, values)
+    }
+
+
+def value_portfolio(stocks, holdings=None, fx_rates=None, base_currency='USD'):
+    quotes = quotes_frame(stocks)
+    positions = positions_frame(quotes, holdings)
+
+    # Amounts in a currency with no rate can't be added to the rest, so those positions are
+    # left out of every total and reported instead. Without any rates, a single-currency book
+    # is valued in its own currency.
+    currencies = positions['currency'].str.upper()
+    if not fx_rates and currencies.nunique() == 1:
+        base_currency = currencies.iloc[0]
+    rates = {currency.upper(): float(rate) for currency, rate in (fx_rates or {}).items()}
+    rates.setdefault(base_currency.upper(), 1.0)
+    fx = currencies.map(rates)
+    cost_fx = positions['cost_currency'].str.upper().map(rates)
+    missing_fx = sorted(set(currencies[fx.isna()]) | set(positions.loc[cost_fx.isna(), 'cost_currency'].str.upper()))
+    valued = fx.notna()
+    unvalued = positions.loc[~valued, 'ticker'].tolist()
+    positions = positions[valued].reset_index(drop=True)
+    fx = fx[valued].to_numpy()
+    cost_fx = cost_fx[valued].to_numpy()
+
+    quantity = positions['quantity'].to_numpy(dtype=float)
+    positions['market_value'] = quantity * positions['price'].to_numpy(dtype=float) * fx
+    positions['cost_value'] = quantity * positions['cost_basis'].to_numpy(dtype=float) * cost_fx
+    positions['unrealized_pnl'] = positions['market_value'] - positions['cost_value']
+
+    total = float(positions['market_value'].sum())
+    has_cost = positions['cost_value'].notna()
+    total_cost = float(positions.loc[has_cost, 'cost_value'].sum())
+    total_pnl = float(positions.loc[has_cost, 'unrealized_pnl'].sum())
+
+    position_rows = []
+    if holdings is not None:
+        market_value = positions['market_value'].to_numpy()
+        pnl = positions['unrealized_pnl'].to_numpy()
+        cost_value = positions['cost_value'].to_numpy()
+        weights = market_value / total * 100 if total > 0 else np.zeros(len(positions))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_pct = np.where(cost_value != 0, pnl / cost_value * 100, np.nan)
+        columns = zip(
+            positions['ticker'].tolist(), quantity.tolist(), positions['price'].tolist(),
+            positions['currency'].tolist(), np.round(market_value, 2).tolist(), np.round(weights, 2).tolist(),
+            np.round(pnl, 2).tolist(), np.round(pnl_pct, 2).tolist()
+        )
+        position_rows = [
+            {
+                'ticker': ticker,
+                'quantity': qty,
+                'price': price,
+                'currency': currency,
+                'market_value': value,
+                'weight_percentage': weight,
+                'unrealized_pnl': None if math.isnan(gain) else gain,
+                'unrealized_pnl_percentage': None if math.isnan(gain_pct) else gain_pct
+            }
+            for ticker, qty, price, currency, value, weight, gain, gain_pct in columns
+        ]
+
+    return {
+        'total_value': round(total, 2),
+        'base_currency': base_currency,
+        'sector_allocation': allocation_table(positions, 'sector', total),
+        'region_allocation': allocation_table(positions, 'region', total),
+        'currency_allocation': allocation_table(positions, 'currency', total),
+        'pnl': {
+            'cost_basis': round(total_cost, 2),
+            'unrealized_pnl': round(total_pnl, 2),
+            'unrealized_pnl_percentage': round(total_pnl / total_cost * 100, 2) if total_cost else None
+        },
+        'positions': position_rows,
+        'market_values': dict(zip(positions['ticker'].tolist(), positions['market_value'].tolist())),
+        'missing_fx_rates': missing_fx,
+        'unvalued_tickers': unvalued
+    }
@@ -0,0 +1,90 @@
+import re
+
+from ..patterns import build_trie_pattern
+
+# Listed in tie-break order: when two intents score the same, the earlier one leads,
+# matching the order the original focus checks ran in.
+INTENT_KEYWORDS = {
+    'price': {'price': 1.0, 'current price': 1.5, 'cost': 0.6, 'value': 0.6, 'trading at': 1.2, 'worth': 0.8, 'quote': 1.0},
+    'risk': {'risk': 1.0, 'exposure': 1.0, 'concentration': 1.0, 'volatility': 0.8, 'drawdown': 0.8},
+    'earnings': {'earnings': 1.0, 'results': 0.8, 'surprise': 0.8, 'eps': 1.0, 'guidance': 0.8},
+    'sectors': {'sector': 1.0, 'allocation': 1.0, 'breakdown': 0.8},
+    'sentiment': {'sentiment': 1.0, 'market': 0.5, 'news': 0.8}
+}
+
+TICKER_ALIASES = {
+    'apple': 'AAPL', 'nvidia': 'NVDA', 'tsmc': 'TSMC', 'taiwan semiconductor': 'TSMC', 'microsoft': 'MSFT',
+    'alphabet': 'GOOGL', 'google': 'GOOGL', 'amazon': 'AMZN', 'meta': 'META', 'tesla': 'TSLA', 'infosys': 'INFY',
+    'samsung': '005930.KS', 'aapl': 'AAPL', 'nvda': 'NVDA', 'msft': 'MSFT', 'googl': 'GOOGL', 'amzn': 'AMZN',
+    'tsla': 'TSLA', 'infy': 'INFY'
+}
+
+# Upper-case words that look like tickers but are ordinary words or finance jargon in a question.
+NON_TICKERS = {
+    'ALL', 'ALSO', 'AM', 'AN', 'AND', 'ANY', 'ARE', 'AS', 'AT', 'BE', 'BEEN', 'BUT', 'BY', 'CAN', 'DID', 'DO',
+    'DOES', 'FOR', 'FROM', 'GET', 'GO', 'HAD', 'HAS', 'HAVE', 'HE', 'HER', 'HIS', 'HOW', 'IF', 'IN', 'IS', 'IT',
+    'ITS', 'JUST', 'ME', 'MY', 'NEW', 'NO', 'NOT', 'NOW', 'OF', 'OFF', 'OK', 'OKAY', 'ON', 'ONE', 'OR', 'OUR',
+    'OUT', 'SHE', 'SO', 'THAN', 'THAT', 'THE', 'THEM', 'THEN', 'THEY', 'THIS', 'TO', 'TODAY', 'UP', 'US', 'WAS',
+    'WE', 'WERE', 'WHAT', 'WHEN', 'WHERE', 'WHICH', 'WHO', 'WHY', 'WILL', 'WITH', 'YES', 'YOU', 'YOUR',
+    'AI', 'ATH', 'CEO', 'CFO', 'CPI', 'EPS', 'ETF', 'EU', 'EUR', 'FAQ', 'GBP', 'GDP', 'IPO', 'JPY', 'PE', 'QOQ',
+    'UK', 'USA', 'USD', 'VAR', 'YOY', 'YTD'
+}
+
+
+class IntentRouter:
+    def __init__(self, intents=None, aliases=None):
+        intents = intents or INTENT_KEYWORDS
+        aliases = aliases if aliases is not None else TICKER_ALIASES
+        self.priority = {intent: i for i, intent in enumerate(intents)}
+        self.phrases = {}
+        for intent, keywords in intents.items():
+            for phrase, weight in keywords.items():
+                self.phrases.setdefault(self.normalize(phrase), []).append((intent, weight))
+        self.aliases = {self.normalize(alias): ticker for alias, ticker in aliases.items()}
+
+        self.lookup = {phrase: (self.phrases.get(phrase, ()), self.aliases.get(phrase))
+                       for phrase in set(self.phrases) | set(self.aliases)}
+
+        body = build_trie_pattern(self.lookup)
+        # Case-sensitive ticker symbols and case-insensitive phrases share one pass. Keywords
+        # match on a word prefix so "prices" or "sectors" still route; aliases must be whole words.
+        self.pattern = re.compile(
+            r"\b(?:(?P<ticker>(?<!\.)[A-Z]{2,5}(?:\.[A-Z]{1,2})?\b)|(?i:(?P<phrase>" + body + r")\w*))"
+        )
+        self.phrase_pattern = re.compile(r"(?i:(?P<phrase>" + body + r")\w*)")
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.lower().split())
+
+    def route(self, query):
+        scores = {}
+        tickers = []
+        for match in self.pattern.finditer(query):
+            token, phrase = match.group('ticker', 'phrase')
+            if token:
+                phrase = token.lower()
+                if phrase not in self.lookup:
+                    # An all-caps word may still be an inflected keyword ("RISKS").
+                    keyword = self.phrase_pattern.fullmatch(token)
+                    phrase = keyword.group('phrase').lower() if keyword else phrase
+            else:
+                phrase = phrase.lower()
+                if not phrase.isalnum():
+                    phrase = ' '.join(phrase.split())
+            weights, ticker = self.lookup.get(phrase, ((), None))
+            if not token and match.end() > match.end('phrase'):
+                # An inflected or longer word ("metadata") is not the alias it starts with.
+                ticker = None
+            for intent, weight in weights:
+                scores[intent] = scores.get(intent, 0.0) + weight
+            if ticker is None and token and not weights and token not in NON_TICKERS:
+                ticker = token
+            if ticker and ticker not in tickers:
+                tickers.append(ticker)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.priority[item[0]]))
+        return {
+            'intents': [{'intent': intent, 'score': round(score, 2)} for intent, score in ranked],
+            'tickers': tickers
+        }
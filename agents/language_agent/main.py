@@ -1,15 +1,37 @@
+import os
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import uvicorn
+import json
+from ..lru import LRUCache
+from .response_cache import response_digest
+from .intent_router import IntentRouter
 
 app = FastAPI(title="Language Agent Service")
 
+RESPONSE_CACHE_SIZE = int(os.getenv("LANGUAGE_RESPONSE_CACHE_SIZE", "1024"))
+SECONDARY_INTENT_SCORE = 0.8
+
 class LanguageRequest(BaseModel):
     analysis_data: Dict[str, Any]
     retrieved_docs: List[Dict[str, Any]]
     user_query: str
 
+class FocusRequest(BaseModel):
+    user_query: str
+
+# Data each focus renders; "news" covers fetching articles and retrieved context.
+QUERY_FIELDS = {
+    'price': ['prices'],
+    'risk': ['allocation', 'risk', 'news'],
+    'earnings': ['earnings', 'news'],
+    'sectors': ['allocation', 'news'],
+    'sentiment': ['sentiment', 'news'],
+    'overview': ['prices', 'allocation', 'risk', 'sentiment', 'earnings', 'news']
+}
+
 class LanguageAgent:
     def __init__(self):
         self.templates = {
@@ -19,6 +41,8 @@ class LanguageAgent:
             "earnings_update": "{ticker} has earnings activity with {sentiment} sentiment",
             "market_sentiment": "Overall market sentiment is {sentiment} based on recent news"
         }
+        self.response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+        self.router = IntentRouter()
     
     def format_portfolio_overview(self, portfolio_data):
         overview = portfolio_data.get('portfolio_overview', {})
@@ -29,18 +53,27 @@ class LanguageAgent:
             total_holdings=total_holdings,
             total_value=total_value
         )
+        unvalued = overview.get('unvalued_tickers')
+        if unvalued:
+            summary += (f" (excluding {', '.join(unvalued)}: no exchange rate for "
+                        f"{', '.join(overview.get('missing_fx_rates', []))})")
         
 
         sectors = overview.get('sector_allocation', {})
+        history = portfolio_data.get('history') or {}
+        sector_changes = history.get('sector_allocation', {})
         sector_text = []
         for sector, data in sectors.items():
             if data['allocation_percentage'] > 5: 
-                sector_text.append(
-                    self.templates["sector_allocation"].format(
-                        sector=sector,
-                        percentage=data['allocation_percentage']
-                    )
+                text = self.templates["sector_allocation"].format(
+                    sector=sector,
+                    percentage=data['allocation_percentage']
                 )
+                change = sector_changes.get(sector)
+                if change and abs(change['change']) >= 0.5:
+                    direction = "up" if change['change'] > 0 else "down"
+                    text += f", {direction} from {change['previous']}% on {history['from_date']}"
+                sector_text.append(text)
         
         if sector_text:
             summary += ". " + ". ".join(sector_text)
@@ -57,6 +90,12 @@ class LanguageAgent:
         if dominant_sector and concentration > 25:
             risk_text += f" due to {concentration}% concentration in {dominant_sector}"
         
+        portfolio_metrics = (risk_data.get('risk_metrics') or {}).get('portfolio') or {}
+        if portfolio_metrics.get('historical_var') is not None:
+            risk_text += f". One-day 95% VaR is {portfolio_metrics['historical_var'] * 100:.1f}% of portfolio value"
+            if portfolio_metrics.get('beta') is not None:
+                risk_text += f" with a beta of {portfolio_metrics['beta']:.2f}"
+        
         return risk_text
     
     def format_earnings_updates(self, market_data):
@@ -129,11 +168,7 @@ class LanguageAgent:
 
 
     
-    def include_retrieved_context(self, retrieved_docs, main_response):
-        if not retrieved_docs:
-            return main_response
-        
-       
+    def format_retrieved_news(self, retrieved_docs):
         news_items = []
         seen_titles = set()
         
@@ -157,93 +192,137 @@ class LanguageAgent:
                 news_items.append(news_item)
         
         if news_items:
-            news_section = "\n\n**Latest News Updates:**\n" + "\n\n".join(news_items)
-            return main_response + news_section
-        
-        return main_response
-
-
+            return "**Latest News Updates:**\n" + "\n\n".join(news_items)
+        return ""
+    
+    def include_retrieved_context(self, retrieved_docs, main_response):
+        news_section = self.format_retrieved_news(retrieved_docs) if retrieved_docs else ""
+        return main_response + "\n\n" + news_section if news_section else main_response
 
     
+    def route_query(self, query):
+        routed = self.router.route(query)
+        ranked = routed['intents']
+        # The strongest intent always leads; weaker ones only add a section when clearly asked for.
+        intents = [item['intent'] for i, item in enumerate(ranked) if i == 0 or item['score'] >= SECONDARY_INTENT_SCORE]
+        routed['query_focus'] = '+'.join(intents) or 'overview'
+        return routed
+    
     def detect_query_focus(self, query):
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['price', 'current price', 'cost', 'value', 'trading at', 'worth']):
-            return 'price'
-        elif any(word in query_lower for word in ['risk', 'exposure', 'concentration']):
-            return 'risk'
-        elif any(word in query_lower for word in ['earnings', 'results', 'surprise']):
-            return 'earnings'
-        elif any(word in query_lower for word in ['sector', 'allocation', 'breakdown']):
-            return 'sectors'
-        elif any(word in query_lower for word in ['sentiment', 'market', 'news']):
-            return 'sentiment'
-        else:
-            return 'overview'
+        return self.route_query(query)['query_focus']
 
     
-    def generate_response(self, analysis_data, retrieved_docs, user_query):
-        query_focus = self.detect_query_focus(user_query)
-        
-        
-        response_parts = []
+    def query_fields(self, query_focus):
+        fields = []
+        for focus in query_focus.split('+'):
+            for field in QUERY_FIELDS.get(focus, QUERY_FIELDS['overview']):
+                if field not in fields:
+                    fields.append(field)
+        return fields
+    
+    def iter_sections(self, analysis_data, retrieved_docs, query_focus):
+        rendered = set()
+        for focus in query_focus.split('+'):
+            for name, text in self.focus_sections(analysis_data, focus):
+                if (name, text) not in rendered:
+                    rendered.add((name, text))
+                    yield name, text
+        
+        news_section = self.format_retrieved_news(retrieved_docs) if retrieved_docs else ""
+        if news_section:
+            yield 'news', news_section
+    
+    def focus_sections(self, analysis_data, query_focus):
+        market_data = analysis_data.get('market_intelligence', {})
         if query_focus == 'price':
-            price_text = self.format_price_info(analysis_data)
-            response_parts.append(price_text)
+            yield 'summary', self.format_price_info(analysis_data)
         
         elif query_focus == 'risk':
-            risk_text = self.format_risk_assessment(analysis_data.get('risk_assessment', {}))
-            response_parts.append(risk_text)
+            yield 'risk', self.format_risk_assessment(analysis_data.get('risk_assessment', {}))
             
         elif query_focus == 'earnings':
-            earnings_text = self.format_earnings_updates(analysis_data.get('market_intelligence', {}))
-            response_parts.append(earnings_text)
+            yield 'earnings', self.format_earnings_updates(market_data)
             
         elif query_focus == 'sectors':
-            portfolio_text = self.format_portfolio_overview(analysis_data)
-            response_parts.append(portfolio_text)
+            yield 'summary', self.format_portfolio_overview(analysis_data)
             
         elif query_focus == 'sentiment':
-            sentiment_text = self.format_market_sentiment(analysis_data.get('market_intelligence', {}))
-            response_parts.append(sentiment_text)
+            yield 'sentiment', self.format_market_sentiment(market_data)
             
         else: 
-            portfolio_text = self.format_portfolio_overview(analysis_data)
-            earnings_text = self.format_earnings_updates(analysis_data.get('market_intelligence', {}))
-            sentiment_text = self.format_market_sentiment(analysis_data.get('market_intelligence', {}))
-            
-        
-            response_parts.extend([portfolio_text, earnings_text, sentiment_text])
-
-        
-        
-        main_response = ". ".join(response_parts)
-        
-        
-        final_response = self.include_retrieved_context(retrieved_docs, main_response)
-        
-        return final_response
+            yield 'summary', self.format_portfolio_overview(analysis_data)
+            yield 'earnings', self.format_earnings_updates(market_data)
+            yield 'sentiment', self.format_market_sentiment(market_data)
+    
+    def join_sections(self, sections):
+        main_response = ". ".join(text for name, text in sections if name != 'news')
+        news = [text for name, text in sections if name == 'news']
+        return main_response + "\n\n" + news[0] if news else main_response
+    
+    def generate_response(self, analysis_data, retrieved_docs, user_query):
+        query_focus = self.detect_query_focus(user_query)
+        return self.join_sections(list(self.iter_sections(analysis_data, retrieved_docs, query_focus)))
+    
+    def stream_response(self, analysis_data, retrieved_docs, user_query):
+        query_focus = self.detect_query_focus(user_query)
+        digest = response_digest(analysis_data, retrieved_docs, query_focus)
+        sections = []
+        for name, text in self.iter_sections(analysis_data, retrieved_docs, query_focus):
+            sections.append((name, text))
+            yield {"section": name, "text": text}
+        self.response_cache.put(digest, self.join_sections(sections))
+        yield {"section": "done", "query_focus": query_focus, "digest": digest}
+    
+    def respond(self, analysis_data, retrieved_docs, user_query):
+        query_focus = self.detect_query_focus(user_query)
+        digest = response_digest(analysis_data, retrieved_docs, query_focus)
+        response = self.response_cache.get(digest)
+        cached = response is not None
+        if not cached:
+            response = self.generate_response(analysis_data, retrieved_docs, user_query)
+            self.response_cache.put(digest, response)
+        return {
+            "response": response,
+            "query_focus": query_focus,
+            "digest": digest,
+            "cached": cached
+        }
 
 language_agent = LanguageAgent()
 
 @app.post("/generate")
 def generate_response(request: LanguageRequest):
     try:
-        response = language_agent.generate_response(
+        return language_agent.respond(
             analysis_data=request.analysis_data,
             retrieved_docs=request.retrieved_docs,
             user_query=request.user_query
         )
-        return {
-            "response": response,
-            "query_focus": language_agent.detect_query_focus(request.user_query)
-        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate/stream")
+def generate_response_stream(request: LanguageRequest):
+    sections = language_agent.stream_response(
+        analysis_data=request.analysis_data,
+        retrieved_docs=request.retrieved_docs,
+        user_query=request.user_query
+    )
+    return StreamingResponse((json.dumps(section) + "\n" for section in sections), media_type="application/x-ndjson")
+
+@app.post("/focus")
+def query_focus(request: FocusRequest):
+    routed = language_agent.route_query(request.user_query)
+    return {**routed, "fields": language_agent.query_fields(routed['query_focus'])}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return language_agent.response_cache.stats()
+
 @app.get("/")
 def root():
     return {"message": "Language Agent Service"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8003)
\ No newline at end of file
+    # Relative imports need the package context: python -m agents.language_agent.main
+    uvicorn.run("agents.language_agent.main:app", host="0.0.0.0", port=8003)
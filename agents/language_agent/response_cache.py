@@ -0,0 +1,30 @@
+import hashlib
+import json
+
+# Parts of the analysis payload each query focus actually renders; anything else
+# can change without invalidating a cached response.
+FOCUS_SECTIONS = {
+    'price': [('portfolio_overview', 'individual_stocks')],
+    'risk': [('risk_assessment',)],
+    'earnings': [('market_intelligence', 'earnings_updates')],
+    'sectors': [('portfolio_overview',), ('history',)],
+    'sentiment': [('market_intelligence', 'sentiment_breakdown')],
+    'overview': [('portfolio_overview',), ('market_intelligence',), ('history',)]
+}
+
+
+def subtree(payload, path):
+    for key in path:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload
+
+
+def response_digest(analysis_data, retrieved_docs, query_focus):
+    sections = [path for focus in query_focus.split('+') for path in FOCUS_SECTIONS.get(focus, FOCUS_SECTIONS['overview'])]
+    relevant = {'.'.join(path): subtree(analysis_data, path) for path in sections}
+    # Retriever ids restart after a restart or clear, so documents are keyed on their content.
+    docs = [(doc.get('ticker'), doc.get('title'), doc.get('summary')) for doc in retrieved_docs[:4]]
+    payload = json.dumps([query_focus, relevant, docs], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
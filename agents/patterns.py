@@ -0,0 +1,28 @@
+import re
+
+
+def build_trie_pattern(phrases):
+    # A character trie emitted as nested groups, so the regex engine walks shared prefixes
+    # once instead of retrying every phrase at each word. Spaces match any run of whitespace.
+    root = {}
+    for phrase in phrases:
+        node = root
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        branches = []
+        terminal = False
+        for char, child in sorted(node.items()):
+            if char == '':
+                terminal = True
+                continue
+            token = r"\s+" if char == ' ' else re.escape(char)
+            branches.append(token + emit(child))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f"(?:{body})?" if terminal else body
+
+    return emit(root)
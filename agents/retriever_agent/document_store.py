@@ -0,0 +1,170 @@
+import hashlib
+import re
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+
+class DocumentStore:
+    def __init__(self):
+        self.next_id = 0
+        self.clear()
+
+    def clear(self):
+        self.ids = array('q')
+        self.ticker_codes = array('I')
+        self.added_at = array('d')
+        self.text_starts = array('Q')
+        self.title_lengths = array('I')
+        self.summary_lengths = array('I')
+        self.alive = bytearray()
+        self.dedup_keys = array('Q')
+        self.text = bytearray()
+        self.tickers = []
+        self.ticker_codes_by_name = {}
+        self.dedup_index = {}
+        self.live_count = 0
+
+    def __len__(self):
+        return self.live_count
+
+    @staticmethod
+    def dedup_key(doc):
+        title = re.sub(r'\s+', ' ', doc.get('title', '').strip().lower())
+        ticker = doc.get('ticker', '').strip().upper()
+        digest = hashlib.blake2b(f"{ticker}\x00{title}".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def contains(self, doc):
+        return self.dedup_key(doc) in self.dedup_index
+
+    def intern_ticker(self, ticker):
+        code = self.ticker_codes_by_name.get(ticker)
+        if code is None:
+            code = len(self.tickers)
+            self.tickers.append(ticker)
+            self.ticker_codes_by_name[ticker] = code
+        return code
+
+    def add(self, doc, added_at):
+        key = self.dedup_key(doc)
+        if key in self.dedup_index:
+            return None
+
+        doc_id = self.next_id
+        self.next_id += 1
+
+        title = doc.get('title', '').encode('utf-8')
+        summary = doc.get('summary', '').encode('utf-8')
+        self.ids.append(doc_id)
+        self.ticker_codes.append(self.intern_ticker(doc.get('ticker', '')))
+        self.added_at.append(added_at)
+        self.text_starts.append(len(self.text))
+        self.title_lengths.append(len(title))
+        self.summary_lengths.append(len(summary))
+        self.alive.append(1)
+        self.dedup_keys.append(key)
+        self.text += title
+        self.text += summary
+        self.dedup_index[key] = doc_id
+        self.live_count += 1
+        return doc_id
+
+    def row_of(self, doc_id):
+        row = bisect_left(self.ids, doc_id)
+        if row < len(self.ids) and self.ids[row] == doc_id and self.alive[row]:
+            return row
+        return None
+
+    def __contains__(self, doc_id):
+        return self.row_of(doc_id) is not None
+
+    def ticker_of(self, doc_id):
+        row = self.row_of(doc_id)
+        return None if row is None else self.tickers[self.ticker_codes[row]]
+
+    def _materialize(self, row):
+        start = self.text_starts[row]
+        title_end = start + self.title_lengths[row]
+        summary_end = title_end + self.summary_lengths[row]
+        return {
+            'ticker': self.tickers[self.ticker_codes[row]],
+            'title': self.text[start:title_end].decode('utf-8'),
+            'summary': self.text[title_end:summary_end].decode('utf-8'),
+            'id': self.ids[row],
+            'added_at': self.added_at[row]
+        }
+
+    def get(self, doc_id):
+        row = self.row_of(doc_id)
+        return None if row is None else self._materialize(row)
+
+    def all(self):
+        return [self._materialize(row) for row in range(len(self.ids)) if self.alive[row]]
+
+    def _live_mask(self):
+        return np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+
+    def select(self, ticker=None, older_than=None):
+        # Criteria narrow each other: ticker and age together mean "this ticker's old documents".
+        if not self.ids:
+            return []
+        selected = self._live_mask()
+        if ticker is not None:
+            code = self.ticker_codes_by_name.get(ticker)
+            if code is None:
+                return []
+            selected &= np.frombuffer(self.ticker_codes, dtype=np.uint32) == code
+        if older_than is not None:
+            selected &= np.frombuffer(self.added_at, dtype=np.float64) < older_than
+        return np.frombuffer(self.ids, dtype=np.int64)[selected].tolist()
+
+    def oldest(self, count):
+        if count <= 0 or not self.ids:
+            return []
+        live_ids = np.frombuffer(self.ids, dtype=np.int64)[self._live_mask()]
+        return live_ids[:count].tolist()
+
+    def remove(self, doc_ids):
+        removed = []
+        for doc_id in doc_ids:
+            row = self.row_of(doc_id)
+            if row is None:
+                continue
+            self.alive[row] = 0
+            del self.dedup_index[self.dedup_keys[row]]
+            self.live_count -= 1
+            removed.append(doc_id)
+        if len(self.ids) > 1024 and self.live_count < len(self.ids) // 2:
+            self.compact()
+        return removed
+
+    def compact(self):
+        old = (self.ids, self.ticker_codes, self.added_at, self.text_starts, self.title_lengths,
+               self.summary_lengths, self.alive, self.dedup_keys, self.text, self.tickers)
+        ids, ticker_codes, added_at, text_starts, title_lengths, summary_lengths, alive, dedup_keys, text, tickers = old
+        next_id = self.next_id
+        self.clear()
+        self.next_id = next_id
+        for row in range(len(ids)):
+            if not alive[row]:
+                continue
+            start = text_starts[row]
+            end = start + title_lengths[row] + summary_lengths[row]
+            self.ids.append(ids[row])
+            self.ticker_codes.append(self.intern_ticker(tickers[ticker_codes[row]]))
+            self.added_at.append(added_at[row])
+            self.text_starts.append(len(self.text))
+            self.title_lengths.append(title_lengths[row])
+            self.summary_lengths.append(summary_lengths[row])
+            self.alive.append(1)
+            self.dedup_keys.append(dedup_keys[row])
+            self.text += text[start:end]
+            self.dedup_index[dedup_keys[row]] = ids[row]
+            self.live_count += 1
+
+    def memory_bytes(self):
+        arrays = (self.ids, self.ticker_codes, self.added_at, self.text_starts,
+                  self.title_lengths, self.summary_lengths, self.dedup_keys)
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.alive) + len(self.text)
@@ -0,0 +1,132 @@
+import threading
+import time
+
+EMBEDDING_BACKENDS = {
+    'mpnet': {
+        'model': 'all-mpnet-base-v2',
+        'kwargs': {}
+    },
+    'mpnet-onnx': {
+        'model': 'all-mpnet-base-v2',
+        'kwargs': {'backend': 'onnx'}
+    },
+    'minilm': {
+        'model': 'all-MiniLM-L6-v2',
+        'kwargs': {}
+    },
+    'minilm-onnx': {
+        'model': 'all-MiniLM-L6-v2',
+        'kwargs': {'backend': 'onnx'}
+    },
+    'minilm-onnx-int8': {
+        'model': 'all-MiniLM-L6-v2',
+        'kwargs': {'backend': 'onnx', 'model_kwargs': {'file_name': 'onnx/model_quint8_avx2.onnx'}}
+    },
+    'paraphrase-minilm-l3': {
+        'model': 'paraphrase-MiniLM-L3-v2',
+        'kwargs': {}
+    }
+}
+
+DEFAULT_BACKEND = 'mpnet'
+ONNX_REQUIREMENT = "sentence-transformers[onnx]>=3.2"
+
+
+def check_backend_dependencies(backend):
+    # The ONNX backends need the `backend=` argument (sentence-transformers 3.2) and optimum's
+    # onnxruntime integration; fail with the install line instead of a TypeError deep in loading.
+    if EMBEDDING_BACKENDS[backend]['kwargs'].get('backend') != 'onnx':
+        return
+    missing = []
+    try:
+        import sentence_transformers
+        version = tuple(int(part) for part in sentence_transformers.__version__.split('.')[:2])
+        if version < (3, 2):
+            missing.append(f"sentence-transformers>=3.2 (found {sentence_transformers.__version__})")
+    except ImportError:
+        missing.append("sentence-transformers>=3.2")
+    try:
+        import onnxruntime  # noqa: F401
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError:
+        missing.append("optimum[onnxruntime]")
+    if missing:
+        raise ImportError(
+            f"Embedding backend '{backend}' requires {', '.join(missing)}; install with: pip install '{ONNX_REQUIREMENT}'"
+        )
+
+
+def backend_kwargs(backend, num_threads=None):
+    kwargs = dict(EMBEDDING_BACKENDS[backend]['kwargs'])
+    if num_threads and kwargs.get('backend') == 'onnx':
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = num_threads
+        kwargs['model_kwargs'] = {**kwargs.get('model_kwargs', {}), 'session_options': session_options}
+    return kwargs
+
+
+def set_thread_count(num_threads):
+    # OMP_NUM_THREADS is only read when torch initializes, so set the live thread pool instead.
+    if not num_threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+class LazyEmbeddingModel:
+    def __init__(self, backend=DEFAULT_BACKEND, num_threads=None):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}'. Available: {', '.join(EMBEDDING_BACKENDS)}")
+        self.backend = backend
+        self.num_threads = num_threads
+        self.load_seconds = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                check_backend_dependencies(self.backend)
+                from sentence_transformers import SentenceTransformer
+                set_thread_count(self.num_threads)
+                kwargs = backend_kwargs(self.backend, self.num_threads)
+                start = time.perf_counter()
+                self._model = SentenceTransformer(EMBEDDING_BACKENDS[self.backend]['model'], **kwargs)
+                self.load_seconds = round(time.perf_counter() - start, 3)
+        return self._model
+
+    def warmup(self, on_ready=None):
+        if self._warmup_thread is not None:
+            return self._warmup_thread
+
+        def run():
+            self.load()
+            if on_ready:
+                on_ready()
+
+        self._warmup_thread = threading.Thread(target=run, name=f"embedding-warmup-{self.backend}", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def encode(self, texts):
+        return self.load().encode(texts, normalize_embeddings=True)
+
+    def info(self):
+        return {
+            'backend': self.backend,
+            'model': EMBEDDING_BACKENDS[self.backend]['model'],
+            'loaded': self.loaded,
+            'load_seconds': self.load_seconds,
+            'num_threads': self.num_threads
+        }
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    def __init__(self, model, max_batch_size=64, max_wait_ms=5):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.pending_texts = 0
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.max_observed_batch = 0
+        self.last_batch_size = 0
+        self.batch_size_histogram = {}
+        self.encode_seconds = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype='float32')
+        future = Future()
+        with self._stats_lock:
+            self.pending_texts += len(texts)
+            self.requests += 1
+        self._ensure_worker()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            start = time.perf_counter()
+            try:
+                embeddings = np.asarray(self.model.encode(texts), dtype='float32')
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                embeddings = None
+            elapsed = time.perf_counter() - start
+
+            with self._stats_lock:
+                self.pending_texts -= size
+                self.batches += 1
+                self.texts += size
+                self.last_batch_size = size
+                self.max_observed_batch = max(self.max_observed_batch, size)
+                bucket = 1 << (size - 1).bit_length()
+                self.batch_size_histogram[bucket] = self.batch_size_histogram.get(bucket, 0) + 1
+                self.encode_seconds += elapsed
+
+            if embeddings is None:
+                continue
+            if len(batch) == 1:
+                batch[0][1].set_result(embeddings)
+                continue
+            # Each caller gets its own copy; a slice would keep the whole co-batched array
+            # alive for as long as any one result is cached.
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(embeddings[offset:offset + len(item_texts)].copy())
+                offset += len(item_texts)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'pending_texts': self.pending_texts,
+                'requests': self.requests,
+                'batches': self.batches,
+                'texts_encoded': self.texts,
+                'avg_batch_size': round(self.texts / self.batches, 2) if self.batches else 0.0,
+                'avg_requests_per_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+                'last_batch_size': self.last_batch_size,
+                'max_batch_size_observed': self.max_observed_batch,
+                'batch_size_histogram': {f"<={k}": v for k, v in sorted(self.batch_size_histogram.items())},
+                'encode_seconds': round(self.encode_seconds, 3),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000
+            }
@@ -0,0 +1,99 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.&][a-z0-9]+)*")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'how', 'in', 'is',
+    'it', 'its', 'me', 'my', 'of', 'on', 'or', 'our', 's', 'show', 'that', 'the', 'to', 'today',
+    'was', 'we', 'what', 'whats', 'when', 'which', 'with', 'any', 'about', 'tell'
+}
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower().replace("'", '')) if token not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def clear(self):
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, term):
+        return term in self.postings
+
+    def add(self, doc_id, text):
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+        length = sum(counts.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id, text):
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in set(tokenize(text)):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[term]
+
+    def is_keyword_query(self, query, max_terms=3, stats=None):
+        # With merged `stats` the check covers the whole corpus rather than this index alone.
+        terms = tokenize(query)
+        known = stats['df'] if stats is not None else self.postings
+        return 0 < len(terms) <= max_terms and all(known.get(term, 0) for term in terms)
+
+    def term_stats(self, query):
+        return {
+            'num_docs': len(self.doc_lengths),
+            'total_length': self.total_length,
+            'df': {term: len(self.postings[term]) for term in set(tokenize(query)) if term in self.postings}
+        }
+
+    def search(self, query, top_k=10, stats=None):
+        # `stats` carries corpus-wide counts from merge_term_stats so partitions of one corpus
+        # produce BM25 scores that compare directly.
+        if not self.doc_lengths:
+            return []
+        if stats is None:
+            num_docs, total_length, df = len(self.doc_lengths), self.total_length, {}
+        else:
+            num_docs, total_length, df = stats['num_docs'], stats['total_length'], stats['df']
+        avg_length = total_length / num_docs
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            doc_freq = df.get(term, len(docs))
+            idf = math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def merge_term_stats(stats_list):
+    merged = {'num_docs': 0, 'total_length': 0, 'df': Counter()}
+    for stats in stats_list:
+        merged['num_docs'] += stats['num_docs']
+        merged['total_length'] += stats['total_length']
+        merged['df'].update(stats['df'])
+    return merged
@@ -1,9 +1,18 @@
+import os
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
+import heapq
+import threading
+import time
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from .query_cache import QueryEmbeddingCache
+from .embedding_backends import LazyEmbeddingModel, DEFAULT_BACKEND
+from .document_store import DocumentStore
+from .lexical_index import BM25Index
+from .embedding_batcher import EmbeddingBatcher
+from .sharding import ShardedRetriever
 
 app = FastAPI(title="Retriever Agent Service", description="Document retrieval and search service")
 
@@ -17,65 +26,332 @@ class SearchRequest(BaseModel):
     top_k: int = 3
     min_score: float = 0.3
     filter_ticker: Optional[str] = None
+    filter_tickers: Optional[List[str]] = None
+    mode: Optional[str] = None
 
 class AddDocumentsRequest(BaseModel):
     documents: List[Document]
 
+class DeleteDocumentsRequest(BaseModel):
+    ids: Optional[List[int]] = None
+    ticker: Optional[str] = None
+    older_than_seconds: Optional[float] = None
+
+class PrecomputeRequest(BaseModel):
+    queries: List[str]
+
+COMMON_QUERIES = [
+    "What's our risk exposure in Asia tech stocks today?",
+    "What are the current stock prices?",
+    "Any earnings surprises today?",
+    "What is the market sentiment?",
+    "Show me the sector allocation of my portfolio",
+]
+
+QUERY_CACHE_SIZE = int(os.getenv("RETRIEVER_QUERY_CACHE_SIZE", "1024"))
+PRECOMPUTE_COMMON_QUERIES = os.getenv("RETRIEVER_PRECOMPUTE_QUERIES", "true").lower() in ("1", "true", "yes")
+EMBEDDING_BACKEND = os.getenv("RETRIEVER_EMBEDDING_BACKEND", DEFAULT_BACKEND)
+EMBEDDING_THREADS = int(os.getenv("RETRIEVER_EMBEDDING_THREADS", "0")) or None
+WARMUP_ON_STARTUP = os.getenv("RETRIEVER_WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+DOCUMENT_TTL_SECONDS = float(os.getenv("RETRIEVER_DOCUMENT_TTL_SECONDS", str(24 * 60 * 60)))
+TTL_SWEEP_SECONDS = float(os.getenv("RETRIEVER_TTL_SWEEP_SECONDS", "60"))
+MAX_DOCUMENTS = int(os.getenv("RETRIEVER_MAX_DOCUMENTS", "0"))
+SEARCH_MODES = ("dense", "lexical", "hybrid", "auto")
+DEFAULT_SEARCH_MODE = os.getenv("RETRIEVER_SEARCH_MODE", "dense")
+LEXICAL_WEIGHT = float(os.getenv("RETRIEVER_LEXICAL_WEIGHT", "0.3"))
+HYBRID_CANDIDATE_FACTOR = 4
+LEXICAL_LOAD_THRESHOLD = int(os.getenv("RETRIEVER_LEXICAL_LOAD_THRESHOLD", "4"))
+BATCH_MAX_SIZE = int(os.getenv("RETRIEVER_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("RETRIEVER_BATCH_MAX_WAIT_MS", "5"))
+NUM_SHARDS = int(os.getenv("RETRIEVER_SHARDS", "0"))
+SHARD_STRATEGY = os.getenv("RETRIEVER_SHARD_STRATEGY", "ticker")
+
+def document_text(doc):
+    return f"Company: {doc['ticker']} | News: {doc['title']} | Details: {doc['summary']}"
+
+def lexical_text(doc):
+    return f"{doc['ticker']} {doc['title']} {doc['summary']}"
+
 class RetrieverAgent:
-    def __init__(self):
-        self.model = SentenceTransformer('all-mpnet-base-v2')
+    def __init__(self, backend=EMBEDDING_BACKEND, num_threads=EMBEDDING_THREADS):
+        self.model = LazyEmbeddingModel(backend, num_threads=num_threads)
+        self.encoder = EmbeddingBatcher(self.model, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
         self.index = None
-        self.documents = []
+        self.documents = DocumentStore()
+        self.lexical_index = BM25Index()
+        self.search_mode = DEFAULT_SEARCH_MODE
+        self.inflight_searches = 0
+        self.inflight_lock = threading.Lock()
+        self.lock = threading.RLock()
+        self.ttl_seconds = DOCUMENT_TTL_SECONDS
+        self.max_documents = MAX_DOCUMENTS
+        self.ttl_stop = threading.Event()
+        self.ttl_thread = None
+        self.query_cache = QueryEmbeddingCache(max_size=QUERY_CACHE_SIZE)
+    
+    def encode_query(self, query):
+        embedding = self.query_cache.get(query)
+        if embedding is None:
+            embedding = self.encoder.encode([self.query_cache.normalize(query)])
+            self.query_cache.put(query, embedding)
+        return embedding
+    
+    def precompute_queries(self, queries):
+        pending = [q for q in dict.fromkeys(self.query_cache.normalize(q) for q in queries) if q and q not in self.query_cache]
+        if not pending:
+            return 0
+        embeddings = self.encoder.encode(pending)
+        for query, embedding in zip(pending, embeddings):
+            self.query_cache.put(query, embedding.reshape(1, -1))
+        return len(pending)
     
     def add_documents(self, docs):
-       
-        existing_titles = {doc.get('title', '') for doc in self.documents}
-        
+        seen_keys = set()
         new_docs = []
-        for doc in docs:
-            if doc.get('title', '') not in existing_titles:
-                new_docs.append(doc)
+        with self.lock:
+            for doc in docs:
+                key = DocumentStore.dedup_key(doc)
+                if key not in seen_keys and key not in self.documents.dedup_index:
+                    seen_keys.add(key)
+                    new_docs.append(doc)
         
         if not new_docs:
-            return 
+            return []
         
-        self.documents.extend(new_docs)
-        texts = [f"Company: {doc['ticker']} | News: {doc['title']} | Details: {doc['summary']}" for doc in new_docs]
-        embeddings = self.model.encode(texts)
+        texts = [document_text(doc) for doc in new_docs]
+        embeddings = self.encoder.encode(texts)
         
-        if self.index is None:
-            self.index = faiss.IndexFlatIP(embeddings.shape[1])
+        with self.lock:
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(embeddings.shape[1]))
+            
+            now = time.time()
+            ids, rows = [], []
+            for row, doc in enumerate(new_docs):
+                doc_id = self.documents.add(doc, now)
+                if doc_id is not None:
+                    ids.append(doc_id)
+                    rows.append(row)
+                    self.lexical_index.add(doc_id, lexical_text(doc))
+            if ids:
+                self.index.add_with_ids(embeddings[rows], np.array(ids, dtype='int64'))
         
-        self.index.add(embeddings.astype('float32'))
-
+        self.enforce_capacity()
+        return ids
     
-    def search(self, query, top_k=3, min_score=0.3, filter_ticker=None):
-        if self.index is None:
-            return []
-        
-        query_embedding = self.model.encode([query])
-        scores, indices = self.index.search(query_embedding.astype('float32'), top_k)
+    def resolve_mode(self, mode):
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Available: {', '.join(SEARCH_MODES)}")
+        return mode
+    
+    def search(self, query, top_k=3, min_score=0.3, filter_ticker=None, filter_tickers=None, mode=None, query_embedding=None):
+        mode = self.resolve_mode(mode)
+        if mode == 'auto':
+            mode = 'hybrid' if query_embedding is not None or not self.should_skip_embedding(query) else 'lexical'
         
+        candidates, best_lexical = self.search_candidates(
+            query, top_k, filter_ticker, filter_tickers, mode, query_embedding
+        )
         results = []
-        for i, score in zip(indices[0], scores[0]):
-            if i < len(self.documents) and score >= min_score:
-                doc = self.documents[i].copy()
+        with self.lock:
+            for doc_id, score in self.rank_candidates(candidates, best_lexical, mode, top_k, min_score):
+                doc = self.documents.get(doc_id)
+                if doc is None:
+                    continue
                 doc['score'] = float(score)
+                doc['search_mode'] = mode
                 results.append(doc)
+        return results
+    
+    @staticmethod
+    def fuse_score(mode, dense_score, lexical_score, best_lexical):
+        lexical_score = lexical_score / best_lexical if best_lexical else 0.0
+        if mode == 'dense':
+            return dense_score
+        if mode == 'lexical':
+            return lexical_score
+        return (1 - LEXICAL_WEIGHT) * dense_score + LEXICAL_WEIGHT * lexical_score
+    
+    def rank_candidates(self, candidates, best_lexical, mode, top_k, min_score):
+        scored = ((key, self.fuse_score(mode, dense, lexical, best_lexical)) for key, dense, lexical in candidates)
+        return heapq.nlargest(top_k, (item for item in scored if item[1] >= min_score), key=lambda item: item[1])
+    
+    def search_candidates(self, query, top_k, filter_ticker=None, filter_tickers=None, mode='hybrid',
+                          query_embedding=None, lexical_stats=None):
+        # Returns (doc_id, dense_score, raw_bm25) candidates plus the best raw BM25 score, leaving
+        # normalization and fusion to rank_candidates so shards can be merged on one scale.
+        if self.index is None:
+            return [], 0.0
         
+        allowed_tickers = set(filter_tickers or [])
         if filter_ticker:
-            results = [r for r in results if r['ticker'] == filter_ticker]
+            allowed_tickers.add(filter_ticker)
         
-        return results
+        with self.inflight_lock:
+            self.inflight_searches += 1
+        try:
+            if mode == 'lexical':
+                query_embedding = None
+            elif query_embedding is None:
+                query_embedding = self.encode_query(query)
+            
+            with self.lock:
+                if self.index is None or self.index.ntotal == 0:
+                    return [], 0.0
+                candidate_k = top_k * 10 if allowed_tickers else top_k
+                if mode == 'dense':
+                    candidates = [(doc_id, score, 0.0) for doc_id, score in self.dense_candidates(query_embedding, candidate_k)]
+                    best_lexical = 0.0
+                elif mode == 'lexical':
+                    hits = self.lexical_index.search(query, candidate_k, stats=lexical_stats)
+                    candidates = [(doc_id, 0.0, score) for doc_id, score in hits]
+                    best_lexical = hits[0][1] if hits else 0.0
+                else:
+                    candidates, best_lexical = self.hybrid_candidates(query, query_embedding, candidate_k, lexical_stats)
+                
+                if allowed_tickers:
+                    candidates = [c for c in candidates if self.documents.ticker_of(c[0]) in allowed_tickers]
+        finally:
+            with self.inflight_lock:
+                self.inflight_searches -= 1
+        
+        return candidates, best_lexical
+    
+    def search_shard(self, query, top_k, filter_ticker=None, filter_tickers=None, mode='hybrid',
+                     query_embedding=None, lexical_stats=None):
+        candidates, best_lexical = self.search_candidates(
+            query, top_k, filter_ticker, filter_tickers, mode, query_embedding, lexical_stats
+        )
+        with self.lock:
+            docs = [(self.documents.get(doc_id), dense, lexical) for doc_id, dense, lexical in candidates]
+        return [candidate for candidate in docs if candidate[0] is not None], best_lexical
+    
+    def lexical_stats(self, query):
+        with self.lock:
+            return self.lexical_index.term_stats(query)
+    
+    def should_skip_embedding(self, query, inflight_searches=None, lexical_stats=None):
+        if query in self.query_cache:
+            return False
+        if inflight_searches is None:
+            inflight_searches = self.inflight_searches
+        under_load = inflight_searches >= LEXICAL_LOAD_THRESHOLD or not self.model.loaded
+        return under_load and self.lexical_index.is_keyword_query(query, stats=lexical_stats)
+    
+    def dense_candidates(self, query_embedding, k):
+        scores, indices = self.index.search(query_embedding, min(k, self.index.ntotal))
+        return [(int(doc_id), float(score)) for doc_id, score in zip(indices[0], scores[0]) if doc_id >= 0]
+    
+    def hybrid_candidates(self, query, query_embedding, k, lexical_stats=None):
+        pool = k * HYBRID_CANDIDATE_FACTOR
+        dense = dict(self.dense_candidates(query_embedding, pool))
+        hits = self.lexical_index.search(query, pool, stats=lexical_stats)
+        lexical = dict(hits)
+        
+        for doc_id in lexical.keys() - dense.keys():
+            vector = self.index.reconstruct(doc_id)
+            dense[doc_id] = float(vector @ query_embedding[0])
+        
+        candidates = [(doc_id, dense_score, lexical.get(doc_id, 0.0)) for doc_id, dense_score in dense.items()]
+        return candidates, hits[0][1] if hits else 0.0
     
     def get_all_documents(self):
-        return self.documents
+        with self.lock:
+            return self.documents.all()
+    
+    def delete_documents(self, ids=None, ticker=None, older_than_seconds=None):
+        with self.lock:
+            if self.index is None:
+                return 0
+            
+            doomed = set(ids or [])
+            if ticker or older_than_seconds is not None:
+                cutoff = time.time() - older_than_seconds if older_than_seconds is not None else None
+                doomed.update(self.documents.select(ticker=ticker or None, older_than=cutoff))
+            
+            for doc_id in doomed:
+                doc = self.documents.get(doc_id)
+                if doc is not None:
+                    self.lexical_index.remove(doc_id, lexical_text(doc))
+            
+            removed = self.documents.remove(doomed)
+            if not removed:
+                return 0
+            
+            self.index.remove_ids(np.array(removed, dtype='int64'))
+            return len(removed)
+    
+    def expire_documents(self):
+        if not self.ttl_seconds:
+            return 0
+        return self.delete_documents(older_than_seconds=self.ttl_seconds)
+    
+    def enforce_capacity(self):
+        if not self.max_documents:
+            return 0
+        with self.lock:
+            overflow = len(self.documents) - self.max_documents
+            if overflow <= 0:
+                return 0
+            oldest = self.documents.oldest(overflow)
+        return self.delete_documents(ids=oldest)
+    
+    def start_ttl_sweeper(self, interval_seconds=TTL_SWEEP_SECONDS):
+        if not self.ttl_seconds or self.ttl_thread is not None:
+            return
+        
+        def sweep():
+            while not self.ttl_stop.wait(interval_seconds):
+                try:
+                    self.expire_documents()
+                except Exception as e:
+                    print(f"TTL sweep failed: {e}")
+        
+        self.ttl_thread = threading.Thread(target=sweep, name="retriever-ttl", daemon=True)
+        self.ttl_thread.start()
+    
+    def stop_ttl_sweeper(self):
+        self.ttl_stop.set()
+    
+    def document_count(self):
+        return len(self.documents)
+    
+    def health(self):
+        return {
+            "total_documents": len(self.documents),
+            "index_ready": self.index is not None,
+            "document_store_bytes": self.documents.memory_bytes(),
+            "document_ttl_seconds": self.ttl_seconds,
+            "query_cache": self.query_cache.stats(),
+            "embedding_model": self.model.info(),
+            "embedding_batcher": self.encoder.stats()
+        }
     
     def clear_documents(self):
-        self.documents = []
-        self.index = None
+        with self.lock:
+            self.documents.clear()
+            self.lexical_index.clear()
+            self.index = None
 
-retriever = RetrieverAgent()
+if NUM_SHARDS > 1:
+    retriever = ShardedRetriever(RetrieverAgent(), NUM_SHARDS, strategy=SHARD_STRATEGY)
+else:
+    retriever = RetrieverAgent()
+
+def warm_query_cache():
+    if PRECOMPUTE_COMMON_QUERIES:
+        retriever.precompute_queries(COMMON_QUERIES)
+
+@app.on_event("startup")
+def start_warmup():
+    if WARMUP_ON_STARTUP:
+        retriever.model.warmup(on_ready=warm_query_cache)
+    retriever.start_ttl_sweeper()
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    retriever.stop_ttl_sweeper()
 
 @app.get("/")
 def root():
@@ -88,13 +364,17 @@ def search_documents(request: SearchRequest):
             query=request.query,
             top_k=request.top_k,
             min_score=request.min_score,
-            filter_ticker=request.filter_ticker
+            filter_ticker=request.filter_ticker,
+            filter_tickers=request.filter_tickers,
+            mode=request.mode
         )
         return {
             "query": request.query,
             "results": results,
             "count": len(results)
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -102,10 +382,11 @@ def search_documents(request: SearchRequest):
 def add_documents(request: AddDocumentsRequest):
     try:
         docs = [doc.dict() for doc in request.documents]
-        retriever.add_documents(docs)
+        ids = retriever.add_documents(docs)
         return {
-            "message": f"Added {len(docs)} documents",
-            "total_documents": len(retriever.documents)
+            "message": f"Added {len(ids)} documents",
+            "document_ids": ids,
+            "total_documents": retriever.document_count()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -129,14 +410,56 @@ def clear_all_documents():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/documents/{doc_id}")
+def delete_document(doc_id: int):
+    removed = retriever.delete_documents(ids=[doc_id])
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+    return {"message": f"Deleted document {doc_id}", "total_documents": retriever.document_count()}
+
+@app.post("/documents/delete")
+def delete_documents(request: DeleteDocumentsRequest):
+    try:
+        removed = retriever.delete_documents(
+            ids=request.ids,
+            ticker=request.ticker,
+            older_than_seconds=request.older_than_seconds
+        )
+        return {
+            "message": f"Deleted {removed} documents",
+            "deleted": removed,
+            "total_documents": retriever.document_count()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/cache/stats")
+def query_cache_stats():
+    return retriever.query_cache.stats()
+
+@app.post("/cache/precompute")
+def precompute_queries(request: PrecomputeRequest):
+    try:
+        added = retriever.precompute_queries(request.queries)
+        return {
+            "message": f"Precomputed {added} query embeddings",
+            "cache": retriever.query_cache.stats()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/batcher/stats")
+def batcher_stats():
+    return retriever.encoder.stats()
+
 @app.get("/health")
 def health_check():
     return {
         "status": "healthy",
-        "total_documents": len(retriever.documents),
-        "index_ready": retriever.index is not None
+        **retriever.health()
     }
 
 if __name__ == "__main__":
+    # Relative imports need the package context: python -m agents.retriever_agent.main
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run("agents.retriever_agent.main:app", host="0.0.0.0", port=8001)
@@ -0,0 +1,15 @@
+import re
+
+from ..lru import LRUCache
+
+
+class QueryEmbeddingCache(LRUCache):
+    def __init__(self, max_size=1024):
+        super().__init__(max_size)
+
+    @staticmethod
+    def normalize(query):
+        return re.sub(r'\s+', ' ', query.strip().lower())
+
+    def key(self, query):
+        return self.normalize(query)
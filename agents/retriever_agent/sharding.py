@@ -0,0 +1,228 @@
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .document_store import DocumentStore
+from .lexical_index import merge_term_stats
+
+SHARD_STRATEGIES = ("ticker", "doc")
+
+
+def run_shard(conn):
+    os.environ["RETRIEVER_SHARDS"] = "0"
+    os.environ["RETRIEVER_PRECOMPUTE_QUERIES"] = "false"
+    from . import main
+    agent = main.retriever
+    if main.WARMUP_ON_STARTUP:
+        agent.model.warmup()
+    agent.start_ttl_sweeper()
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            agent.stop_ttl_sweeper()
+            conn.close()
+            return
+        method, args, kwargs = message
+        try:
+            conn.send(("ok", getattr(agent, method)(*args, **kwargs)))
+        except Exception as e:
+            # Send the exception itself so callers can tell a bad request (ValueError) from a failure.
+            try:
+                conn.send(("error", e))
+            except Exception:
+                conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class Shard:
+    def __init__(self, index, context):
+        self.index = index
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_shard, args=(child_conn,), name=f"retriever-shard-{index}", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+
+    def call(self, method, *args, **kwargs):
+        with self.lock:
+            self.conn.send((method, args, kwargs))
+            status, result = self.conn.recv()
+        if status == "error":
+            raise result
+        return result
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+
+
+class ShardedRetriever:
+    def __init__(self, front, num_shards, strategy="ticker"):
+        if strategy not in SHARD_STRATEGIES:
+            raise ValueError(f"Unknown shard strategy '{strategy}'. Available: {', '.join(SHARD_STRATEGIES)}")
+        self.front = front
+        self.num_shards = num_shards
+        self.strategy = strategy
+        self.shards = None
+        self.start_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix="retriever-scatter")
+        self.inflight_searches = 0
+        self.inflight_lock = threading.Lock()
+
+    @property
+    def model(self):
+        return self.front.model
+
+    @property
+    def query_cache(self):
+        return self.front.query_cache
+
+    @property
+    def encoder(self):
+        return self.front.encoder
+
+    def ensure_started(self):
+        if self.shards is not None:
+            return self.shards
+        with self.start_lock:
+            if self.shards is None:
+                context = multiprocessing.get_context("spawn")
+                self.shards = [Shard(i, context) for i in range(self.num_shards)]
+        return self.shards
+
+    def shard_for(self, doc):
+        if self.strategy == "ticker":
+            return zlib.crc32(doc.get("ticker", "").strip().upper().encode("utf-8")) % self.num_shards
+        return DocumentStore.dedup_key(doc) % self.num_shards
+
+    def to_global(self, shard_index, doc):
+        doc["id"] = doc["id"] * self.num_shards + shard_index
+        return doc
+
+    def scatter(self, method, *args, shards=None, **kwargs):
+        targets = shards if shards is not None else self.ensure_started()
+        futures = [(shard, self.pool.submit(shard.call, method, *args, **kwargs)) for shard in targets]
+        return [(shard, future.result()) for shard, future in futures]
+
+    def add_documents(self, docs):
+        shards = self.ensure_started()
+        partitions = {}
+        for doc in docs:
+            partitions.setdefault(self.shard_for(doc), []).append(doc)
+        futures = [
+            (index, self.pool.submit(shards[index].call, "add_documents", batch))
+            for index, batch in partitions.items()
+        ]
+        ids = []
+        for index, future in futures:
+            ids.extend(local_id * self.num_shards + index for local_id in future.result())
+        return ids
+
+    def search(self, query, top_k=3, min_score=0.3, filter_ticker=None, filter_tickers=None, mode=None):
+        mode = self.front.resolve_mode(mode)
+        with self.inflight_lock:
+            self.inflight_searches += 1
+        try:
+            return self.scatter_search(query, top_k, min_score, filter_ticker, filter_tickers, mode)
+        finally:
+            with self.inflight_lock:
+                self.inflight_searches -= 1
+
+    def scatter_search(self, query, top_k, min_score, filter_ticker, filter_tickers, mode):
+        shards = self.ensure_started()
+        # BM25 idf and document length are corpus-wide, so every shard scores with the merged
+        # counts; raw scores are then normalized and fused once here. The merged counts also
+        # tell auto mode whether the query is all known keywords, which the front's empty
+        # index cannot.
+        lexical_stats = None
+        if mode != "dense":
+            lexical_stats = merge_term_stats(stats for _, stats in self.scatter("lexical_stats", query, shards=shards))
+        if mode == "auto":
+            skip = self.front.should_skip_embedding(query, self.inflight_searches, lexical_stats)
+            mode = "lexical" if skip else "hybrid"
+        query_embedding = None if mode == "lexical" else self.front.encode_query(query)
+
+        if self.strategy == "ticker" and (filter_ticker or filter_tickers):
+            tickers = set(filter_tickers or []) | ({filter_ticker} if filter_ticker else set())
+            wanted = {self.shard_for({"ticker": ticker}) for ticker in tickers}
+            shards = [shard for shard in shards if shard.index in wanted]
+
+        responses = self.scatter(
+            "search_shard", query, top_k, filter_ticker=filter_ticker, filter_tickers=filter_tickers,
+            mode=mode, query_embedding=query_embedding, lexical_stats=lexical_stats, shards=shards
+        )
+        best_lexical = max((best for _, (_, best) in responses), default=0.0)
+        candidates = [
+            (self.to_global(shard.index, doc), dense, lexical)
+            for shard, (docs, _) in responses for doc, dense, lexical in docs
+        ]
+        results = []
+        for doc, score in self.front.rank_candidates(candidates, best_lexical, mode, top_k, min_score):
+            doc["score"] = float(score)
+            doc["search_mode"] = mode
+            results.append(doc)
+        return results
+
+    def get_all_documents(self):
+        return [self.to_global(shard.index, doc) for shard, docs in self.scatter("get_all_documents") for doc in docs]
+
+    def delete_documents(self, ids=None, ticker=None, older_than_seconds=None):
+        shards = self.ensure_started()
+        local_ids = {}
+        for doc_id in ids or []:
+            local_ids.setdefault(doc_id % self.num_shards, []).append(doc_id // self.num_shards)
+
+        removed = 0
+        for shard in shards:
+            shard_ids = local_ids.get(shard.index)
+            if ticker and self.strategy == "ticker" and self.shard_for({"ticker": ticker}) != shard.index:
+                # The ticker lives elsewhere, so this shard can only lose explicitly listed ids.
+                if shard_ids:
+                    removed += shard.call("delete_documents", ids=shard_ids)
+            elif shard_ids or ticker or older_than_seconds is not None:
+                removed += shard.call("delete_documents", ids=shard_ids, ticker=ticker,
+                                      older_than_seconds=older_than_seconds)
+        return removed
+
+    def clear_documents(self):
+        self.scatter("clear_documents")
+
+    def precompute_queries(self, queries):
+        return self.front.precompute_queries(queries)
+
+    def document_count(self):
+        return sum(count for _, count in self.scatter("document_count"))
+
+    def health(self):
+        shard_health = [health for _, health in self.scatter("health")]
+        return {
+            "total_documents": sum(h["total_documents"] for h in shard_health),
+            "index_ready": any(h["index_ready"] for h in shard_health),
+            "document_store_bytes": sum(h["document_store_bytes"] for h in shard_health),
+            "document_ttl_seconds": self.front.ttl_seconds,
+            "query_cache": self.front.query_cache.stats(),
+            "embedding_model": self.front.model.info(),
+            "embedding_batcher": self.front.encoder.stats(),
+            "sharding": {"shards": self.num_shards, "strategy": self.strategy},
+            "shards": [
+                {"shard": i, "total_documents": h["total_documents"], "embedding_model": h["embedding_model"],
+                 "embedding_batcher": h["embedding_batcher"]}
+                for i, h in enumerate(shard_health)
+            ]
+        }
+
+    def start_ttl_sweeper(self):
+        self.ensure_started()
+
+    def stop_ttl_sweeper(self):
+        if self.shards is None:
+            return
+        for shard in self.shards:
+            shard.close()
+        self.shards = None
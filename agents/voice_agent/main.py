@@ -1,70 +1,144 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import os
+from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-import tempfile
 import io
+import json
+import shutil
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from .audio_cache import AudioCache, audio_key, split_sentences
+from .tts_engines import join_wav, load_engine, wav_frames, wav_stream_header
+from .stt_engines import decode_audio, load_stt_engine, transcribe_stream
 
+TTS_ENGINE = load_engine(os.getenv("VOICE_TTS_ENGINE"))
+TTS_AVAILABLE = TTS_ENGINE.available()
 
-try:
-    from gtts import gTTS
-    TTS_AVAILABLE = True
-except ImportError:
-    TTS_AVAILABLE = False
-
-
-try:
-    import speech_recognition as sr
-    STT_AVAILABLE = True
-except ImportError:
-    STT_AVAILABLE = False
+STT_ENGINE = load_stt_engine(os.getenv("VOICE_STT_ENGINE"))
+STT_AVAILABLE = STT_ENGINE.available()
 
 app = FastAPI(title="Voice Agent Service")
 
+TTS_CACHE_DIR = os.getenv("VOICE_TTS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"))
+TTS_CACHE_MAX_MB = float(os.getenv("VOICE_TTS_CACHE_MAX_MB", "256"))
+TTS_WORKERS = int(os.getenv("VOICE_TTS_WORKERS", "4"))
+
 class TTSRequest(BaseModel):
     text: str
     voice_speed: int = 150  
+    language: str = "en"
 
 class VoiceAgent:
     def __init__(self):
-        if STT_AVAILABLE:
-            self.recognizer = sr.Recognizer()
+        self.stt_engine = STT_ENGINE
+        self.engine = TTS_ENGINE
+        self.audio_cache = AudioCache(os.path.join(TTS_CACHE_DIR, self.engine.name),
+                                      int(TTS_CACHE_MAX_MB * 1024 * 1024), suffix=self.engine.suffix)
+        self.executor = ThreadPoolExecutor(max_workers=TTS_WORKERS)
     
-    def text_to_speech(self, text):
+    def synthesize(self, text, language='en', speed=150):
         if not TTS_AVAILABLE:
-            raise Exception("TTS not available. Install gTTS: pip install gTTS")
+            raise Exception(f"TTS engine '{self.engine.name}' not available")
         try:
-            tts = gTTS(text=text, lang='en')
-            mp3_fp = io.BytesIO()
-            tts.write_to_fp(mp3_fp)
-            mp3_fp.seek(0)
-            return mp3_fp.read()
+            return self.engine.synthesize(text, language, speed)
         except Exception as e:
             raise Exception(f"TTS error: {str(e)}")
     
+    def sentence_audio(self, sentence, language='en', speed=150):
+        key = audio_key(sentence, language, speed)
+        audio = self.audio_cache.get(key)
+        if audio is not None:
+            return audio, True
+        audio = self.synthesize(sentence, language, speed)
+        self.audio_cache.put(key, audio)
+        return audio, False
+    
+    def cache_status(self, text, language='en', speed=150):
+        sentences = split_sentences(text)
+        hits = sum(self.audio_cache.contains(audio_key(s, language, speed)) for s in sentences)
+        return 'hit' if sentences and hits == len(sentences) else ('partial' if hits else 'miss')
+    
+    def stream_speech(self, text, language='en', speed=150):
+        # Every sentence is submitted at once; chunks are yielded in order as soon as each
+        # finishes, so playback starts after the first sentence instead of the whole text.
+        # The first sentence is awaited here so an engine failure still surfaces as an error
+        # before any response is started.
+        futures = [self.executor.submit(self.sentence_audio, sentence, language, speed)
+                   for sentence in split_sentences(text)]
+        if not futures:
+            return iter(())
+        try:
+            first = futures[0].result()[0]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        return self.speech_chunks(first, futures[1:])
+    
+    def completed_audio(self, first, pending):
+        yield first
+        for future in pending:
+            try:
+                yield future.result()[0]
+            except Exception as e:
+                # Headers are already sent, so end the audio at the last good sentence.
+                print(f"TTS stream stopped early: {e}")
+                return
+    
+    def speech_chunks(self, first, pending):
+        header_sent = False
+        try:
+            for audio in self.completed_audio(first, pending):
+                if self.engine.suffix != '.wav':
+                    yield audio
+                    continue
+                params, frames = wav_frames(audio)
+                if not header_sent:
+                    yield wav_stream_header(params)
+                    header_sent = True
+                yield frames
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def cached_speech(self, text, language='en', speed=150):
+        # MP3 frames concatenate cleanly; WAV chunks are re-wrapped under one header.
+        status = self.cache_status(text, language, speed)
+        futures = [self.executor.submit(self.sentence_audio, sentence, language, speed)
+                   for sentence in split_sentences(text)]
+        chunks = [future.result()[0] for future in futures]
+        audio = join_wav(chunks) if self.engine.suffix == '.wav' else b''.join(chunks)
+        return audio, status
+    
+    def text_to_speech(self, text, language='en', speed=150):
+        return self.cached_speech(text, language, speed)[0]
+    
+    def decode_upload(self, audio_file):
+        try:
+            return decode_audio(audio_file.read())
+        except Exception as e:
+            raise Exception(f"Could not decode audio: {str(e)}")
+    
+    def transcribe_stream(self, audio_file):
+        if not STT_AVAILABLE:
+            raise Exception(f"STT engine '{self.stt_engine.name}' not available")
+        return transcribe_stream(self.stt_engine, self.decode_upload(audio_file))
+    
     def speech_to_text(self, audio_file):
         if not STT_AVAILABLE:
-            raise Exception("STT not available. Install SpeechRecognition: pip install SpeechRecognition")
+            raise Exception(f"STT engine '{self.stt_engine.name}' not available")
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(audio_file.read())
-                temp_path = temp_file.name
-            with sr.AudioFile(temp_path) as source:
-                audio_data = self.recognizer.record(source)
-            text = self.recognizer.recognize_google(audio_data)
-            return text
-        except sr.UnknownValueError:
-            raise Exception("Could not understand audio")
-        except sr.RequestError as e:
-            raise Exception(f"Speech recognition error: {str(e)}")
+            # One pass over the whole clip; partial decoding is only for the streaming endpoints.
+            text = self.stt_engine.recognize(self.decode_upload(audio_file))
         except Exception as e:
+            if type(e).__name__ == 'UnknownValueError':
+                raise Exception("Could not understand audio")
             raise Exception(f"STT error: {str(e)}")
-        finally:
-            try:
-                import os
-                os.unlink(temp_path)
-            except:
-                pass
+        if not text:
+            raise Exception("Could not understand audio")
+        return text
     
     def get_simple_tts_response(self, text):
         return {
@@ -80,11 +154,13 @@ def text_to_speech(request: TTSRequest):
     try:
         if not TTS_AVAILABLE:
             return voice_agent.get_simple_tts_response(request.text)
-        audio_data = voice_agent.text_to_speech(request.text)
+        cache_status = voice_agent.cache_status(request.text, request.language, request.voice_speed)
         return StreamingResponse(
-            io.BytesIO(audio_data),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=response.mp3"}
+            voice_agent.stream_speech(request.text, request.language, request.voice_speed),
+            media_type=TTS_ENGINE.media_type,
+            headers={"Content-Disposition": f"attachment; filename=response{TTS_ENGINE.suffix}",
+                     "X-TTS-Cache": cache_status,
+                     "X-TTS-Engine": TTS_ENGINE.name}
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,12 +183,61 @@ def speech_to_text(audio: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/stt/stream")
+def speech_to_text_stream(audio: UploadFile = File(...)):
+    try:
+        results = voice_agent.transcribe_stream(audio.file)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse((json.dumps(result) + "\n" for result in results), media_type="application/x-ndjson")
+
+@app.websocket("/stt/ws")
+async def speech_to_text_socket(websocket: WebSocket):
+    # Clients send 16 kHz mono int16 PCM as binary frames and the text "end" to finish.
+    await websocket.accept()
+    if not STT_AVAILABLE:
+        await websocket.close(code=1011, reason="STT not available")
+        return
+    session = STT_ENGINE.session()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message.get("bytes"):
+                if len(message["bytes"]) % 2:
+                    await websocket.close(code=1003, reason="PCM16 frames must have an even byte length")
+                    return
+                partial = await run_in_threadpool(session.feed, np.frombuffer(message["bytes"], dtype="<i2"))
+                if partial:
+                    await websocket.send_json({"text": partial, "final": False})
+            elif message["type"] == "websocket.disconnect":
+                return
+            elif message.get("text") == "end":
+                break
+        final = await run_in_threadpool(session.finish)
+        await websocket.send_json({"text": final, "final": True})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/cache/stats")
+def cache_stats():
+    return voice_agent.audio_cache.stats()
+
+@app.delete("/cache")
+def clear_cache():
+    voice_agent.audio_cache.clear()
+    return {"message": "TTS cache cleared"}
+
 @app.get("/capabilities")
 def get_capabilities():
     return {
         "tts_available": TTS_AVAILABLE,
+        "tts_engine": TTS_ENGINE.name,
+        "tts_offline": TTS_ENGINE.offline,
         "stt_available": STT_AVAILABLE,
-        "supported_formats": ["wav", "mp3"] if STT_AVAILABLE else [],
+        "stt_engine": STT_ENGINE.name,
+        "stt_offline": STT_ENGINE.offline,
+        "supported_formats": (["wav"] + (["mp3", "webm", "ogg"] if shutil.which("ffmpeg") else [])) if STT_AVAILABLE else [],
         "message": "Voice processing capabilities"
     }
 
@@ -128,7 +253,7 @@ def test_tts():
             audio_data = voice_agent.text_to_speech(sample_text)
             return StreamingResponse(
                 io.BytesIO(audio_data),
-                media_type="audio/mpeg"
+                media_type=TTS_ENGINE.media_type
             )
         else:
             return {"message": "TTS test - audio generation not available"}
@@ -143,4 +268,5 @@ def test_stt():
     }
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8004)
+    # Relative imports need the package context: python -m agents.voice_agent.main
+    uvicorn.run("agents.voice_agent.main:app", host="0.0.0.0", port=8004)
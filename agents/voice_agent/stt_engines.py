@@ -0,0 +1,238 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import threading
+import wave
+
+import numpy as np
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+try:
+    import vosk
+except ImportError:
+    vosk = None
+
+try:
+    import speech_recognition as sr
+except ImportError:
+    sr = None
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.5
+
+
+# Uploads are decoded to 16 kHz mono int16 PCM entirely in memory.
+def decode_audio(data):
+    if data[:4] == b'RIFF':
+        with wave.open(io.BytesIO(data), 'rb') as reader:
+            params = reader.getparams()
+            frames = reader.readframes(reader.getnframes())
+        if params.sampwidth == 2:
+            samples = np.frombuffer(frames, dtype='<i2').astype(np.float32)
+        elif params.sampwidth == 1:
+            samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) * 256
+        elif params.sampwidth == 4:
+            samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 65536
+        else:
+            raise ValueError(f"Unsupported WAV sample width: {params.sampwidth}")
+        samples = samples.reshape(-1, params.nchannels).mean(axis=1)
+        if params.framerate != SAMPLE_RATE and samples.size:
+            duration = samples.size / params.framerate
+            target = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+            samples = np.interp(target, np.arange(samples.size) / params.framerate, samples)
+        return np.clip(samples, -32768, 32767).astype(np.int16)
+
+    # Compressed formats (mp3, webm, ogg) are piped through ffmpeg.
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise ValueError("Only WAV audio can be decoded without ffmpeg installed")
+    result = subprocess.run(
+        [ffmpeg, '-loglevel', 'error', '-i', 'pipe:0', '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+        input=data, capture_output=True, check=True, timeout=120
+    )
+    return np.frombuffer(result.stdout, dtype='<i2')
+
+
+def quiet_point(pcm, frame=SAMPLE_RATE // 10):
+    # Lowest-energy 100 ms frame in the last quarter of the buffer, so a committed window
+    # ends between words rather than inside one.
+    start = pcm.size * 3 // 4
+    frames = (pcm.size - start) // frame
+    if frames == 0:
+        return pcm.size
+    energy = np.abs(pcm[start:start + frames * frame].astype(np.float32)).reshape(frames, frame).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+class WhisperSession:
+    # Whisper is not incremental, so partials re-transcribe only the uncommitted tail. Once the
+    # tail reaches the window length it is cut at a quiet point and its text committed, keeping
+    # each re-decode bounded by the window instead of the whole stream.
+    def __init__(self, engine, partial_seconds, window_seconds):
+        self.engine = engine
+        self.partial_samples = int(partial_seconds * SAMPLE_RATE)
+        self.window_samples = int(window_seconds * SAMPLE_RATE)
+        self.committed = []
+        self.tail = np.zeros(0, dtype=np.int16)
+        self.since_decode = 0
+
+    def text(self, tail_text=''):
+        return ' '.join(part for part in self.committed + [tail_text] if part)
+
+    def feed(self, pcm):
+        self.tail = np.concatenate([self.tail, pcm])
+        self.since_decode += pcm.size
+        if self.since_decode < self.partial_samples:
+            return None
+        self.since_decode = 0
+        if self.tail.size >= self.window_samples:
+            cut = quiet_point(self.tail)
+            self.committed.append(self.engine.recognize(self.tail[:cut]))
+            self.tail = self.tail[cut:]
+            return self.text()
+        return self.text(self.engine.recognize(self.tail))
+
+    def finish(self):
+        return self.text(self.engine.recognize(self.tail) if self.tail.size else '')
+
+
+class FasterWhisperEngine:
+    name = 'faster-whisper'
+    offline = True
+
+    def __init__(self):
+        self.model_size = os.getenv("VOICE_STT_MODEL", "small")
+        self.partial_seconds = float(os.getenv("VOICE_STT_PARTIAL_SECONDS", "2"))
+        self.window_seconds = float(os.getenv("VOICE_STT_WINDOW_SECONDS", "10"))
+        self._model = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        return WhisperModel is not None
+
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = WhisperModel(self.model_size, device='cpu', compute_type='int8')
+        return self._model
+
+    def recognize(self, pcm):
+        segments, _ = self.model().transcribe(pcm.astype(np.float32) / 32768.0, language='en', beam_size=1)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+
+    def session(self):
+        return WhisperSession(self, self.partial_seconds, self.window_seconds)
+
+
+class VoskSession:
+    def __init__(self, model):
+        self.recognizer = vosk.KaldiRecognizer(model, SAMPLE_RATE)
+        self.finals = []
+
+    def feed(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm.astype('<i2').tobytes()):
+            text = json.loads(self.recognizer.Result()).get('text', '')
+            if text:
+                self.finals.append(text)
+            return ' '.join(self.finals)
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        return ' '.join(self.finals + [partial]).strip() if partial else None
+
+    def finish(self):
+        text = json.loads(self.recognizer.FinalResult()).get('text', '')
+        return ' '.join(self.finals + ([text] if text else []))
+
+
+class VoskEngine:
+    name = 'vosk'
+    offline = True
+
+    def __init__(self):
+        self.model_path = os.getenv("VOICE_VOSK_MODEL_PATH")
+        self._model = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        return vosk is not None and bool(self.model_path) and os.path.isdir(self.model_path)
+
+    def session(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = vosk.Model(self.model_path)
+        return VoskSession(self._model)
+
+    def recognize(self, pcm):
+        session = self.session()
+        step = int(CHUNK_SECONDS * SAMPLE_RATE)
+        for start in range(0, pcm.size, step):
+            session.feed(pcm[start:start + step])
+        return session.finish()
+
+
+class GoogleSession:
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.buffer = []
+
+    def feed(self, pcm):
+        self.buffer.append(pcm)
+        return None
+
+    def finish(self):
+        pcm = np.concatenate(self.buffer) if self.buffer else np.zeros(0, dtype=np.int16)
+        audio = sr.AudioData(pcm.astype('<i2').tobytes(), SAMPLE_RATE, 2)
+        return self.recognizer.recognize_google(audio)
+
+
+class GoogleEngine:
+    name = 'google'
+    offline = False
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer() if sr is not None else None
+
+    def available(self):
+        return sr is not None
+
+    def session(self):
+        return GoogleSession(self.recognizer)
+
+    def recognize(self, pcm):
+        session = GoogleSession(self.recognizer)
+        session.buffer.append(pcm)
+        return session.finish()
+
+
+STT_ENGINES = {engine.name: engine for engine in (FasterWhisperEngine, VoskEngine, GoogleEngine)}
+
+
+def load_stt_engine(name=None):
+    if name:
+        if name not in STT_ENGINES:
+            raise ValueError(f"Unknown STT engine '{name}'. Available: {', '.join(STT_ENGINES)}")
+        return STT_ENGINES[name]()
+    for engine_class in STT_ENGINES.values():
+        engine = engine_class()
+        if engine.available():
+            return engine
+    return GoogleEngine()
+
+
+def transcribe_stream(engine, pcm, chunk_seconds=CHUNK_SECONDS):
+    session = engine.session()
+    step = int(chunk_seconds * SAMPLE_RATE)
+    last = None
+    for start in range(0, pcm.size, step):
+        partial = session.feed(pcm[start:start + step])
+        if partial and partial != last:
+            last = partial
+            yield {'text': partial, 'final': False}
+    yield {'text': session.finish(), 'final': True}
@@ -0,0 +1,140 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+
+try:
+    from gtts import gTTS
+except ImportError:
+    gTTS = None
+
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+
+
+class GTTSEngine:
+    name = 'gtts'
+    media_type = 'audio/mpeg'
+    suffix = '.mp3'
+    offline = False
+
+    def available(self):
+        return gTTS is not None
+
+    def synthesize(self, text, language='en', speed=150):
+        mp3_fp = io.BytesIO()
+        gTTS(text=text, lang=language, slow=speed < 120).write_to_fp(mp3_fp)
+        return mp3_fp.getvalue()
+
+
+class EspeakEngine:
+    name = 'espeak'
+    media_type = 'audio/wav'
+    suffix = '.wav'
+    offline = True
+
+    def __init__(self):
+        self.binary = shutil.which('espeak-ng') or shutil.which('espeak')
+
+    def available(self):
+        return self.binary is not None
+
+    def synthesize(self, text, language='en', speed=150):
+        # Each call is its own process, so sentences synthesize concurrently without a lock.
+        result = subprocess.run(
+            [self.binary, '--stdout', '-v', language, '-s', str(speed), text],
+            capture_output=True, check=True, timeout=60
+        )
+        return result.stdout
+
+
+class Pyttsx3Engine:
+    name = 'pyttsx3'
+    media_type = 'audio/wav'
+    suffix = '.wav'
+    offline = True
+
+    def __init__(self):
+        self._engine = None
+        # pyttsx3 drives a single native speech loop that is not thread-safe.
+        self._lock = threading.Lock()
+
+    def available(self):
+        # The macOS driver writes AIFF whatever the file suffix; WAV is only produced
+        # by the espeak (Linux) and SAPI5 (Windows) drivers.
+        return pyttsx3 is not None and sys.platform != 'darwin'
+
+    def synthesize(self, text, language='en', speed=150):
+        # pyttsx3 speaks with the system default voice; `language` is ignored.
+        with self._lock:
+            if self._engine is None:
+                self._engine = pyttsx3.init()
+            self._engine.setProperty('rate', speed)
+            # pyttsx3 can only render to a file path.
+            fd, path = tempfile.mkstemp(suffix='.wav')
+            os.close(fd)
+            try:
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+                with open(path, 'rb') as handle:
+                    audio = handle.read()
+            finally:
+                os.unlink(path)
+        if audio[:4] != b'RIFF':
+            raise RuntimeError("pyttsx3 did not produce WAV audio on this platform")
+        return audio
+
+
+TTS_ENGINES = {engine.name: engine for engine in (GTTSEngine, EspeakEngine, Pyttsx3Engine)}
+
+
+def load_engine(name=None):
+    if name:
+        if name not in TTS_ENGINES:
+            raise ValueError(f"Unknown TTS engine '{name}'. Available: {', '.join(TTS_ENGINES)}")
+        return TTS_ENGINES[name]()
+    for engine_class in TTS_ENGINES.values():
+        engine = engine_class()
+        if engine.available():
+            return engine
+    return GTTSEngine()
+
+
+def wav_stream_header(params):
+    # Sizes are unknown while streaming, so RIFF and data lengths use the 0xFFFFFFFF convention.
+    header = io.BytesIO()
+    with wave.open(header, 'wb') as writer:
+        writer.setnchannels(params.nchannels)
+        writer.setsampwidth(params.sampwidth)
+        writer.setframerate(params.framerate)
+    data = bytearray(header.getvalue())
+    data[4:8] = (0xFFFFFFFF).to_bytes(4, 'little')
+    data[-4:] = (0xFFFFFFFF).to_bytes(4, 'little')
+    return bytes(data)
+
+
+def wav_frames(audio):
+    with wave.open(io.BytesIO(audio), 'rb') as reader:
+        return reader.getparams(), reader.readframes(reader.getnframes())
+
+
+def join_wav(chunks):
+    params, frames = None, []
+    for chunk in chunks:
+        params, chunk_frames = wav_frames(chunk)
+        frames.append(chunk_frames)
+    out = io.BytesIO()
+    if params is None:
+        return b''
+    with wave.open(out, 'wb') as writer:
+        writer.setnchannels(params.nchannels)
+        writer.setsampwidth(params.sampwidth)
+        writer.setframerate(params.framerate)
+        writer.writeframes(b''.join(frames))
+    return out.getvalue()
@@ -17,6 +17,7 @@ app = FastAPI(
     
 class TickerRequest(BaseModel):
     tickers: List[str]
+    fields: Optional[List[str]] = None
 
 
 def get_multi_data(tickers: List[str]):
@@ -25,9 +26,9 @@ def get_multi_data(tickers: List[str]):
         results.append(get_stock_data(ticker))
     return results
 
-def get_multi_data_with_news(tickers: List[str], news_limit: int = 2):
+def get_multi_data_with_news(tickers: List[str], news_limit: int = 2, fields: Optional[List[str]] = None):
     stock_data = get_multi_data(tickers)
-    news_data = get_ticker_news(tickers, limit=news_limit)
+    news_data = get_ticker_news(tickers, limit=news_limit) if fields is None or "news" in fields else []
     
     return {
         'stocks': stock_data,
@@ -63,12 +64,12 @@ async def get_single_stock(ticker: str):
 
 @app.post("/combined")
 async def get_combined_data(request: TickerRequest, news_limit: int = 2):
-    """Get combined stock data and news"""
+    """Get combined stock data and news (news only when fields is omitted or includes it)"""
     if not request.tickers:
         raise HTTPException(status_code=400, detail="At least one ticker required")
     
     try:
-        return get_multi_data_with_news(request.tickers, news_limit)
+        return get_multi_data_with_news(request.tickers, news_limit, request.fields)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -10,6 +10,7 @@ def get_stock_data(ticker: str):
             "currency": info.get("currency", "Unknown Currency"),
             "longName": info.get("longName", "Unknown stock name"),
             "sector": info.get("sector", "Unable to get sector"),
+            "country": info.get("country"),
         }
     except Exception as e:
         return {"error": str(e)}
@@ -0,0 +1,131 @@
+"""Compare retriever embedding backends.
+
+Usage: python benchmarks/embedding_backends.py [--backends mpnet minilm-onnx-int8] [--docs 2000]
+
+Each backend runs in its own subprocess so peak memory is measured in isolation.
+Quality is reported as top-k overlap with the reference backend and as the share
+of queries whose top hit belongs to the expected ticker.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+TICKERS = {
+    'AAPL': 'Apple', 'NVDA': 'Nvidia', 'TSMC': 'Taiwan Semiconductor', 'MSFT': 'Microsoft',
+    'AMZN': 'Amazon', 'INFY': 'Infosys', 'SSNLF': 'Samsung', 'BABA': 'Alibaba'
+}
+EVENTS = [
+    '{name} beats quarterly earnings estimates on strong {product} demand',
+    '{name} misses revenue guidance as {product} sales decline',
+    '{name} raises full-year outlook after record {product} shipments',
+    'Analysts cut {name} price target amid {product} supply concerns',
+    '{name} announces buyback as {product} margins expand',
+    'Regulators probe {name} over {product} pricing practices',
+]
+PRODUCTS = ['iPhone', 'GPU', 'chip', 'cloud', 'AI server', 'smartphone', 'data center', 'software']
+QUERIES = [
+    ('Did {name} beat earnings?', '{ticker}'),
+    ('{ticker} guidance cut', '{ticker}'),
+    ('What is the outlook for {name}?', '{ticker}'),
+]
+
+
+def build_corpus(num_docs, seed=7):
+    rng = random.Random(seed)
+    docs = []
+    tickers = list(TICKERS)
+    for _ in range(num_docs):
+        ticker = rng.choice(tickers)
+        name = TICKERS[ticker]
+        title = rng.choice(EVENTS).format(name=name, product=rng.choice(PRODUCTS))
+        docs.append({'ticker': ticker, 'title': title, 'summary': f"{name} ({ticker}) {title.lower()}."})
+    queries = [(q.format(name=TICKERS[t], ticker=t), t) for t in tickers for q, _ in QUERIES]
+    return docs, queries
+
+
+def run_backend(backend, num_docs, top_k, threads):
+    import faiss
+    from agents.retriever_agent.embedding_backends import LazyEmbeddingModel
+
+    docs, queries = build_corpus(num_docs)
+    texts = [f"Company: {d['ticker']} | News: {d['title']} | Details: {d['summary']}" for d in docs]
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    model = LazyEmbeddingModel(backend, num_threads=threads)
+    model.load()
+
+    start = time.perf_counter()
+    doc_embeddings = model.encode(texts).astype('float32')
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_embeddings = model.encode([q for q, _ in queries]).astype('float32')
+    query_seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    index = faiss.IndexFlatIP(doc_embeddings.shape[1])
+    index.add(doc_embeddings)
+    _, indices = index.search(query_embeddings, top_k)
+    ticker_hits = sum(1 for (_, ticker), row in zip(queries, indices) if docs[row[0]]['ticker'] == ticker)
+
+    return {
+        'backend': backend,
+        'dimension': int(doc_embeddings.shape[1]),
+        'load_seconds': model.load_seconds,
+        'docs_per_sec': round(len(texts) / encode_seconds, 1),
+        'query_ms': round(query_seconds / len(queries) * 1000, 2),
+        'peak_rss_mb': round(rss_after / 1024, 1),
+        'model_rss_mb': round((rss_after - rss_before) / 1024, 1),
+        'top1_ticker_accuracy': round(ticker_hits / len(queries), 3),
+        'top_k': indices.tolist()
+    }
+
+
+def main():
+    from agents.retriever_agent.embedding_backends import EMBEDDING_BACKENDS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=list(EMBEDDING_BACKENDS))
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.docs, args.top_k, args.threads or None)))
+        return
+
+    results = []
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, '--docs', str(args.docs),
+             '--top-k', str(args.top_k), '--threads', str(args.threads)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ''}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    if not results:
+        return
+    reference = results[0]['top_k']
+    header = f"{'backend':<22}{'dim':>5}{'load s':>8}{'docs/s':>10}{'query ms':>10}{'rss MB':>9}{'top1 acc':>10}{'overlap':>9}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        overlap = sum(len(set(a) & set(b)) for a, b in zip(reference, result['top_k'])) / (len(reference) * args.top_k)
+        print(f"{result['backend']:<22}{result['dimension']:>5}{result['load_seconds']:>8}{result['docs_per_sec']:>10}"
+              f"{result['query_ms']:>10}{result['model_rss_mb']:>9}{result['top1_ticker_accuracy']:>10}{overlap:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
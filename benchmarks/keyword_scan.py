@@ -0,0 +1,81 @@
+"""Benchmark analysis-agent keyword scanning.
+
+Usage: python benchmarks/keyword_scan.py [--articles 5000] [--extra-keywords 500]
+
+Compares the original per-keyword substring loop against the compiled
+KeywordScanner over synthetic news articles, optionally with a padded lexicon.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from agents.analysis_agent.keyword_scanner import DEFAULT_LEXICONS, KeywordScanner
+
+WORDS = ('apple nvidia tsmc shares stock market investors analysts quarter demand supply chip iphone '
+         'data center guidance revenue earnings beat miss surge drop outlook cloud margin upgrade setup '
+         'results growth weak strong concern risk bullish bearish eps estimate profit loss decline').split()
+
+
+def build_articles(count, seed=11):
+    rng = random.Random(seed)
+    return [
+        {'title': ' '.join(rng.choices(WORDS, k=12)), 'summary': ' '.join(rng.choices(WORDS, k=60))}
+        for _ in range(count)
+    ]
+
+
+def pad_lexicons(lexicons, extra, seed=13):
+    rng = random.Random(seed)
+    padded = {name: list(words) for name, words in lexicons.items()}
+    for i in range(extra):
+        name = rng.choice(list(padded))
+        padded[name].append(f"{rng.choice(WORDS)}{i}x")
+    return padded
+
+
+def substring_scan(articles, lexicons):
+    counts = []
+    for article in articles:
+        content = f"{article['title']} {article['summary']}".lower()
+        counts.append({name: sum(1 for k in words if k in content) for name, words in lexicons.items()})
+    return counts
+
+
+def compiled_scan(articles, scanner):
+    return [scanner.counts(f"{article['title']} {article['summary']}") for article in articles]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=5000)
+    parser.add_argument('--extra-keywords', type=int, default=0)
+    args = parser.parse_args()
+
+    articles = build_articles(args.articles)
+    lexicons = pad_lexicons(DEFAULT_LEXICONS, args.extra_keywords)
+    keyword_count = sum(len(words) for words in lexicons.values())
+
+    start = time.perf_counter()
+    scanner = KeywordScanner(lexicons)
+    compile_seconds = time.perf_counter() - start
+
+    substring_seconds = timed(substring_scan, articles, lexicons)
+    compiled_seconds = timed(compiled_scan, articles, scanner)
+
+    print(f"{args.articles} articles, {keyword_count} keywords (compile {compile_seconds * 1000:.1f} ms)")
+    print(f"{'substring loop':<18}{substring_seconds * 1000:>10.1f} ms{args.articles / substring_seconds:>12.0f} articles/s")
+    print(f"{'compiled scanner':<18}{compiled_seconds * 1000:>10.1f} ms{args.articles / compiled_seconds:>12.0f} articles/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark language-agent query routing.
+
+Usage: python benchmarks/query_routing.py [--queries 100000] [--extra-keywords 0]
+
+Compares the original chain of substring checks (first match only) against the
+compiled IntentRouter (ranked intents plus tickers) over a synthetic query corpus.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from agents.language_agent.intent_router import INTENT_KEYWORDS, IntentRouter
+
+LEGACY_CHECKS = [
+    ('price', ['price', 'current price', 'cost', 'value', 'trading at', 'worth']),
+    ('risk', ['risk', 'exposure', 'concentration']),
+    ('earnings', ['earnings', 'results', 'surprise']),
+    ('sectors', ['sector', 'allocation', 'breakdown']),
+    ('sentiment', ['sentiment', 'market', 'news'])
+]
+
+FILLER = ('what is our in the of my portfolio today how are doing show me and for with about '
+          'tell give latest this week quarter compared against').split()
+KEYWORDS = [phrase for keywords in INTENT_KEYWORDS.values() for phrase in keywords]
+NAMES = ['NVDA', 'AAPL', 'TSMC', 'Apple', 'Nvidia', 'MSFT', 'Tesla', 'Samsung']
+
+
+def build_queries(count, seed=17):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(4, 10))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORDS))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(NAMES))
+        queries.append(' '.join(words) + '?')
+    return queries
+
+
+def pad_intents(intents, extra, seed=19):
+    rng = random.Random(seed)
+    padded = {intent: dict(keywords) for intent, keywords in intents.items()}
+    for i in range(extra):
+        padded[rng.choice(list(padded))][f"{rng.choice(FILLER)}term{i}"] = 0.5
+    return padded
+
+
+def legacy_route(queries, checks):
+    focuses = []
+    for query in queries:
+        query_lower = query.lower()
+        focus = 'overview'
+        for name, words in checks:
+            if any(word in query_lower for word in words):
+                focus = name
+                break
+        focuses.append(focus)
+    return focuses
+
+
+def compiled_route(queries, router):
+    return [router.route(query) for query in queries]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--extra-keywords', type=int, default=0)
+    args = parser.parse_args()
+
+    queries = build_queries(args.queries)
+    intents = pad_intents(INTENT_KEYWORDS, args.extra_keywords)
+    checks = [(intent, list(keywords)) for intent, keywords in intents.items()]
+    keyword_count = sum(len(words) for _, words in checks)
+
+    start = time.perf_counter()
+    router = IntentRouter(intents)
+    compile_seconds = time.perf_counter() - start
+
+    legacy_seconds = timed(legacy_route, queries, checks)
+    compiled_seconds = timed(compiled_route, queries, router)
+
+    routed = compiled_route(queries[:2000], router)
+    multi = sum(len(r['intents']) > 1 for r in routed) / len(routed)
+    with_tickers = sum(bool(r['tickers']) for r in routed) / len(routed)
+
+    print(f"{args.queries} queries, {keyword_count} keywords (compile {compile_seconds * 1000:.1f} ms)")
+    print(f"{'substring chain':<18}{legacy_seconds * 1000:>10.1f} ms{args.queries / legacy_seconds:>12.0f} queries/s  (first intent only)")
+    print(f"{'compiled router':<18}{compiled_seconds * 1000:>10.1f} ms{args.queries / compiled_seconds:>12.0f} queries/s  (ranked intents + tickers)")
+    print(f"multi-intent queries: {multi:.0%}, queries with tickers: {with_tickers:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -449,13 +449,14 @@ def render_audio_player(audio_data: bytes, response_text: str):
     
 
     audio_base64 = base64.b64encode(audio_data).decode()
+    audio_type = "audio/wav" if audio_data[:4] == b"RIFF" else "audio/mpeg"
     
 
     audio_html = f"""
     <div class="audio-player">
         <p><strong>Text:</strong> {response_text[:200]}{'...' if len(response_text) > 200 else ''}</p>
         <audio controls style="width: 100%; margin-top: 1rem;">
-            <source src="data:audio/mpeg;base64,{audio_base64}" type="audio/mpeg">
+            <source src="data:{audio_type};base64,{audio_base64}" type="{audio_type}">
             Your browser does not support the audio element.
         </audio>
         <div style="margin-top: 1rem; font-size: 0.9rem; color: var(--text-muted);">
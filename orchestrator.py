@@ -1,9 +1,13 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import requests
 import uvicorn
 import asyncio
+import json
+from agents.language_agent.response_cache import response_digest
+from agents.lru import LRUCache
 
 app = FastAPI(title="Finance Assistant Orchestrator")
 
@@ -20,6 +24,9 @@ class QueryRequest(BaseModel):
     query: str
     tickers: Optional[List[str]] = ["AAPL", "TSMC", "NVDA"]  
     use_voice: Optional[bool] = False
+    holdings: Optional[List[Dict[str, Any]]] = None
+    fx_rates: Optional[Dict[str, float]] = None
+    portfolio_id: Optional[str] = None
 
 class VoiceQueryRequest(BaseModel):
     tickers: Optional[List[str]] = ["AAPL", "TSMC", "NVDA"]
@@ -27,6 +34,7 @@ class VoiceQueryRequest(BaseModel):
 class Orchestrator:
     def __init__(self):
         self.confidence_threshold = 0.3
+        self.response_cache = LRUCache(1024)
     
     def call_service(self, service_name, endpoint, data=None, method="GET"):
         try:
@@ -53,9 +61,13 @@ class Orchestrator:
             print(f"Error calling {service_name}: {e}")
             return None
     
-    def get_market_data(self, tickers):
+    def get_query_focus(self, query):
+        return self.call_service("language", "/focus", {"user_query": query}, method="POST") or {}
+    
+    def get_market_data(self, tickers, fields=None):
         data = self.call_service("api_agent", "/combined", {
-            "tickers": tickers
+            "tickers": tickers,
+            "fields": fields
         }, method="POST")
         
         if not data:
@@ -63,15 +75,19 @@ class Orchestrator:
     
         return data
     
-    def analyze_portfolio(self, stocks, news):
+    def analyze_portfolio(self, stocks, news, holdings=None, fx_rates=None, portfolio_id=None, fields=None):
         analysis_data = self.call_service("analysis", "/analyze", {
             "stocks": stocks,
-            "news": news
+            "news": news,
+            "holdings": holdings,
+            "fx_rates": fx_rates,
+            "portfolio_id": portfolio_id,
+            "fields": [field for field in fields if field != "news"] if fields else None
         }, method="POST")
         
         return analysis_data
     
-    def retrieve_relevant_docs(self, query, news_data):
+    def retrieve_relevant_docs(self, query, news_data, tickers=None):
         docs_to_add = []
         for article in news_data:
             docs_to_add.append({
@@ -88,44 +104,84 @@ class Orchestrator:
         search_result = self.call_service("retriever", "/search", {
             "query": query,
             "top_k": 3,
-            "min_score": self.confidence_threshold
+            "min_score": self.confidence_threshold,
+            "filter_tickers": tickers,
+            "mode": "auto"
         }, method="POST")
         
         return search_result.get("results", []) if search_result else []
     
-    def generate_language_response(self, analysis_data, retrieved_docs, query):
+    def generate_language_response(self, analysis_data, retrieved_docs, query, query_focus=None):
+        # Same digest the language agent computes, so a repeat answer skips the /generate hop.
+        digest = response_digest(analysis_data, retrieved_docs, query_focus) if query_focus else None
+        cached = self.response_cache.get(digest) if digest else None
+        if cached is not None:
+            return cached
+        
         response_data = self.call_service("language", "/generate", {
             "analysis_data": analysis_data,
             "retrieved_docs": retrieved_docs,
             "user_query": query
         }, method="POST")
         
-        return response_data.get("response", "Unable to generate response") if response_data else "Service unavailable"
+        if not response_data:
+            return "Service unavailable"
+        if response_data.get("digest"):
+            self.response_cache.put(response_data["digest"], response_data["response"])
+        return response_data.get("response", "Unable to generate response")
     
-    def process_text_query(self, query, tickers):
+    def stream_language_response(self, analysis_data, retrieved_docs, query):
+        try:
+            with requests.post(f"{SERVICES['language']}/generate/stream", json={
+                "analysis_data": analysis_data,
+                "retrieved_docs": retrieved_docs,
+                "user_query": query
+            }, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+        except requests.exceptions.RequestException as e:
+            print(f"Service call failed for language: {e}")
+            yield {"section": "error", "text": "Service unavailable"}
     
-        self.call_service("retriever", "/documents", method="DELETE")
-
-        market_data = self.get_market_data(tickers)
+    def prepare_query(self, query, tickers, holdings=None, fx_rates=None, portfolio_id=None):
+        focus = self.get_query_focus(query)
+        fields = focus.get("fields")
+        # Tickers named in the query only narrow retrieval; valuation always covers the requested
+        # or portfolio tickers so held positions never drop out of the answer.
+        tickers = list(dict.fromkeys((tickers or []) + [h["ticker"] for h in holdings or [] if h.get("ticker")]))
+        mentioned = set(focus.get("tickers") or [])
+        news_tickers = [ticker for ticker in tickers if ticker in mentioned] or tickers
+        market_data = self.get_market_data(tickers, fields)
         stocks = market_data.get("stocks", [])
         news = market_data.get("news", [])
         
-        analysis_data = self.analyze_portfolio(stocks, news)
+        analysis_data = self.analyze_portfolio(stocks, news, holdings, fx_rates, portfolio_id, fields)
         if not analysis_data:
-            return "Analysis service unavailable"
-        
-        retrieved_docs = self.retrieve_relevant_docs(query, news)
+            return None
         
-        response = self.generate_language_response(analysis_data, retrieved_docs, query)
+        wants_news = fields is None or "news" in fields
+        retrieved_docs = self.retrieve_relevant_docs(query, news, news_tickers) if wants_news else []
         
         return {
-            "response": response,
+            "query_focus": focus.get("query_focus"),
             "analysis_data": analysis_data,
             "retrieved_docs": retrieved_docs,
             "market_data_points": len(stocks),
             "news_articles": len(news)
         }
     
+    def process_text_query(self, query, tickers, holdings=None, fx_rates=None, portfolio_id=None):
+        context = self.prepare_query(query, tickers, holdings, fx_rates, portfolio_id)
+        if not context:
+            return "Analysis service unavailable"
+        
+        response = self.generate_language_response(context["analysis_data"], context["retrieved_docs"], query,
+                                                   context.pop("query_focus"))
+        
+        return {"response": response, **context}
+    
     def convert_speech_to_text(self, audio_file):
         return "What's our risk exposure in Asia tech stocks today?"
     
@@ -142,7 +198,8 @@ orchestrator = Orchestrator()
 @app.post("/query")
 def process_query(request: QueryRequest):
     try:
-        result = orchestrator.process_text_query(request.query, request.tickers)
+        result = orchestrator.process_text_query(request.query, request.tickers, request.holdings, request.fx_rates,
+                                                 request.portfolio_id)
         
         if request.use_voice:
             tts_result = orchestrator.convert_text_to_speech(result["response"])
@@ -153,6 +210,15 @@ def process_query(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+def process_query_stream(request: QueryRequest):
+    context = orchestrator.prepare_query(request.query, request.tickers, request.holdings, request.fx_rates,
+                                         request.portfolio_id)
+    if not context:
+        raise HTTPException(status_code=503, detail="Analysis service unavailable")
+    sections = orchestrator.stream_language_response(context["analysis_data"], context["retrieved_docs"], request.query)
+    return StreamingResponse((json.dumps(section) + "\n" for section in sections), media_type="application/x-ndjson")
+
 @app.post("/voice-query")
 def process_voice_query(request: VoiceQueryRequest, audio: UploadFile = File(...)):
     try:
@@ -191,7 +257,7 @@ def root():
     return {
         "message": "Finance Assistant Orchestrator",
         "services": list(SERVICES.keys()),
-        "endpoints": ["/query", "/voice-query", "/health"]
+        "endpoints": ["/query", "/query/stream", "/voice-query", "/health"]
     }
 
 @app.get("/test")
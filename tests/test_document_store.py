@@ -0,0 +1,30 @@
+from agents.retriever_agent.document_store import DocumentStore
+
+
+def make_store():
+    store = DocumentStore()
+    store.add({'ticker': 'AAPL', 'title': 'Old Apple', 'summary': 'a'}, added_at=100.0)
+    store.add({'ticker': 'AAPL', 'title': 'New Apple', 'summary': 'b'}, added_at=900.0)
+    store.add({'ticker': 'NVDA', 'title': 'Old Nvidia', 'summary': 'c'}, added_at=100.0)
+    store.add({'ticker': 'NVDA', 'title': 'New Nvidia', 'summary': 'd'}, added_at=900.0)
+    return store
+
+
+def test_select_single_criteria():
+    store = make_store()
+    assert store.select(ticker='AAPL') == [0, 1]
+    assert store.select(older_than=500.0) == [0, 2]
+    assert store.select(ticker='MSFT') == []
+
+
+def test_select_combined_filters_intersect():
+    store = make_store()
+    assert store.select(ticker='AAPL', older_than=500.0) == [0]
+    assert store.select(ticker='MSFT', older_than=500.0) == []
+
+
+def test_select_skips_removed_documents():
+    store = make_store()
+    store.remove([0])
+    assert store.select(ticker='AAPL', older_than=500.0) == []
+    assert store.select(older_than=500.0) == [2]
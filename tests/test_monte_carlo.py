@@ -0,0 +1,46 @@
+import numpy as np
+
+from agents.analysis_agent.monte_carlo import MonteCarloEngine
+
+
+def make_log_returns():
+    rng = np.random.default_rng(3)
+    return rng.normal(0.0002, 0.012, (2, 300))
+
+
+def test_single_chunk_matches_direct_simulation():
+    log_returns = make_log_returns()
+    result = MonteCarloEngine(workers=1).simulate(log_returns, [3.0, 1.0], num_paths=10000, seed=11, horizon_days=5)
+
+    rng = np.random.default_rng(np.random.SeedSequence(11).spawn(1)[0])
+    shocks = rng.standard_normal((10000, 2))
+    cholesky = np.linalg.cholesky(np.cov(log_returns))
+    simulated = 5 * log_returns.mean(axis=1) + np.sqrt(5) * shocks @ cholesky.T
+    outcomes = np.expm1(simulated) @ np.array([0.75, 0.25])
+    threshold = np.quantile(outcomes, 0.05)
+    assert np.isclose(result['var'], -threshold)
+    assert np.isclose(result['cvar'], -outcomes[outcomes <= threshold].mean())
+    assert np.isclose(result['expected_return'], outcomes.mean())
+
+
+def test_parallel_run_reproduces_serial_run():
+    log_returns = make_log_returns()
+    engine = MonteCarloEngine(workers=2)
+    try:
+        parallel = engine.simulate(log_returns, [1.0, 1.0], num_paths=60000, seed=5)
+    finally:
+        engine.shutdown()
+    serial = MonteCarloEngine(workers=1).simulate(log_returns, [1.0, 1.0], num_paths=60000, seed=5)
+    assert parallel['workers'] == 2
+    assert serial['workers'] == 1
+    for key in ('var', 'cvar', 'expected_return', 'worst_path_return', 'best_path_return'):
+        assert parallel[key] == serial[key]
+
+
+def test_simulate_covariance_matches_simulate_from_returns():
+    log_returns = make_log_returns()
+    engine = MonteCarloEngine(workers=1)
+    from_returns = engine.simulate(log_returns, [1.0, 2.0], num_paths=20000, seed=2)
+    from_matrix = engine.simulate_covariance(log_returns.mean(axis=1), np.cov(log_returns), [1.0, 2.0],
+                                             num_paths=20000, seed=2)
+    assert from_returns['var'] == from_matrix['var']
@@ -0,0 +1,59 @@
+import numpy as np
+
+from agents.analysis_agent.online_covariance import OnlineCovariance
+
+
+def make_bars():
+    rng = np.random.default_rng(1)
+    returns = rng.multivariate_normal([0.001, 0.0], [[1e-4, 4e-5], [4e-5, 2e-4]], size=120)
+    return returns, [{'aapl': float(a), 'msft': float(b)} for a, b in returns]
+
+
+def test_welford_matches_numpy_cov():
+    returns, bars = make_bars()
+    estimator = OnlineCovariance()
+    estimator.update_many(bars)
+    tickers, cov, corr, counts = estimator.covariance('welford')
+    assert tickers == ['AAPL', 'MSFT']
+    assert np.allclose(cov, np.cov(returns.T))
+    assert np.allclose(corr, np.corrcoef(returns.T))
+    assert (counts == 120).all()
+    assert np.allclose(estimator.mean(tickers), returns.mean(axis=0))
+
+
+def test_welford_uses_only_shared_observations():
+    returns, bars = make_bars()
+    for bar in bars[:30]:
+        bar['msft'] = None
+    estimator = OnlineCovariance()
+    estimator.update_many(bars)
+    _, cov, _, counts = estimator.covariance('welford', ['aapl', 'msft'])
+    assert counts.tolist() == [[120, 90], [90, 90]]
+    assert np.isclose(cov[0, 0], np.var(returns[:, 0], ddof=1))
+    assert np.isclose(cov[0, 1], np.cov(returns[30:].T)[0, 1])
+
+
+def test_ewma_matches_weighted_sum():
+    returns, bars = make_bars()
+    lam = 0.9
+    estimator = OnlineCovariance(lam)
+    estimator.update_many(bars)
+    _, cov, _, _ = estimator.covariance('ewma')
+    # The first bar seeds the estimate, then each later bar decays it by lam.
+    weights = (1 - lam) * lam ** np.arange(len(returns) - 1, -1, -1)
+    weights[0] = lam ** (len(returns) - 1)
+    expected = (returns * weights[:, None]).T @ returns
+    assert np.allclose(cov, expected)
+
+
+def test_state_survives_save_and_load(tmp_path):
+    _, bars = make_bars()
+    estimator = OnlineCovariance(0.94)
+    estimator.update_many(bars)
+    path = str(tmp_path / 'covariance.npz')
+    estimator.save(path)
+    restored = OnlineCovariance.load(path, lam=0.97)
+    assert restored.lam == 0.97
+    assert restored.bars == 120
+    for method in ('welford', 'ewma'):
+        assert np.array_equal(restored.covariance(method)[1], estimator.covariance(method)[1])
@@ -0,0 +1,51 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from agents.analysis_agent.risk_metrics import analyze_risk, covariance_risk
+
+
+def make_returns():
+    rng = np.random.default_rng(7)
+    return rng.normal(0.0005, 0.01, (3, 250))
+
+
+def test_holding_metrics_match_numpy():
+    returns = make_returns()
+    result = analyze_risk({'A': returns[0].tolist(), 'B': returns[1].tolist(), 'C': returns[2].tolist()})
+    series = returns[1]
+    threshold = np.quantile(series, 0.05)
+    z = NormalDist().inv_cdf(0.05)
+    metrics = result['holdings']['B']
+    assert result['observations'] == 250
+    assert metrics['historical_var'] == round(-threshold, 4)
+    assert metrics['historical_cvar'] == round(-series[series <= threshold].mean(), 4)
+    assert metrics['parametric_var'] == round(-(series.mean() + z * series.std(ddof=1)), 4)
+    assert metrics['volatility'] == round(series.std(ddof=1) * np.sqrt(252), 4)
+
+
+def test_portfolio_metrics_use_normalized_weights():
+    returns = make_returns()
+    by_ticker = {'A': returns[0].tolist(), 'B': returns[1].tolist(), 'C': returns[2].tolist()}
+    result = analyze_risk(by_ticker, portfolios={'p': {'A': 3.0, 'C': 1.0}}, horizon_days=4)
+    portfolio = 0.75 * returns[0] + 0.25 * returns[2]
+    assert result['portfolios']['p']['historical_var'] == round(-np.quantile(portfolio, 0.05) * 2, 4)
+
+
+def test_beta_matches_least_squares_slope():
+    returns = make_returns()
+    benchmark = returns[0] * 0.5 + returns[2] * 0.5
+    result = analyze_risk({'A': returns[0].tolist()}, benchmark_returns=benchmark.tolist())
+    slope = np.polyfit(benchmark, returns[0], 1)[0]
+    assert result['holdings']['A']['beta'] == round(slope, 4)
+
+
+def test_covariance_risk_matches_return_history():
+    returns = make_returns()
+    tickers = ['A', 'B', 'C']
+    portfolios = {'p': {'A': 1.0, 'B': 1.0}}
+    from_history = analyze_risk(dict(zip(tickers, returns.tolist())), portfolios=portfolios)
+    from_matrix = covariance_risk(tickers, np.cov(returns), returns.mean(axis=1), portfolios)
+    for key in ('parametric_var', 'parametric_cvar', 'volatility'):
+        assert from_matrix['holdings']['C'][key] == from_history['holdings']['C'][key]
+        assert from_matrix['portfolios']['p'][key] == from_history['portfolios']['p'][key]
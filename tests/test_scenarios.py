@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from agents.analysis_agent.scenarios import run_scenarios
+
+STOCKS = [
+    {'ticker': 'AAPL', 'price': 200.0, 'sector': 'Technology'},
+    {'ticker': 'MSFT', 'price': 400.0, 'sector': 'Technology'},
+    {'ticker': 'XOM', 'price': 100.0, 'sector': 'Energy'}
+]
+
+
+def test_pnl_matches_direct_computation():
+    scenarios = [
+        {'name': 'selloff', 'market_shock': -0.1, 'sector_shocks': {'Energy': 0.05}},
+        {'name': 'rates', 'factor_shocks': {'rates': 0.01}, 'ticker_shocks': {'AAPL': -0.3}}
+    ]
+    quantities = [[10.0, 5.0, 20.0], [0.0, 1.0, 50.0]]
+    result = run_scenarios(STOCKS, scenarios, tickers=['AAPL', 'MSFT', 'XOM'], weights=quantities,
+                           factor_exposures={'MSFT': {'rates': -2.0}, 'XOM': {'rates': 1.5}})
+
+    values = np.array(quantities) * np.array([200.0, 400.0, 100.0])
+    returns = np.array([
+        [-0.1, -0.1, -0.05],
+        [-0.3, -0.02, 0.015]
+    ])
+    pnl = values @ returns.T
+    for p, portfolio in enumerate(result['portfolios']):
+        assert portfolio['total_value'] == round(values[p].sum(), 2)
+        assert [row['pnl'] for row in portfolio['scenarios']] == np.round(pnl[p], 2).tolist()
+    assert result['portfolios'][0]['worst_scenario'] == 'rates'
+
+
+def test_unknown_shock_keys_are_rejected():
+    scenarios = [{'name': 'typo', 'sector_shocks': {'Tech': -0.2}, 'ticker_shocks': {'NVDA': -0.1}}]
+    with pytest.raises(ValueError, match="typo: sector_shocks Tech; ticker_shocks NVDA"):
+        run_scenarios(STOCKS, scenarios)
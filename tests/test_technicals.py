@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from agents.analysis_agent.technicals import TechnicalIndicators, compute_indicators
+
+
+def make_series():
+    rng = np.random.default_rng(4)
+    closes = 100 + np.cumsum(rng.normal(0, 1, (2, 60)), axis=1)
+    return closes, closes + 1.5, closes - 1.0
+
+
+def test_update_matches_full_recompute():
+    closes, highs, lows = make_series()
+    indicators = TechnicalIndicators()
+    indicators.fit({'A': closes[0, :40].tolist(), 'B': closes[1, :40].tolist()},
+                   {'A': highs[0, :40].tolist(), 'B': highs[1, :40].tolist()},
+                   {'A': lows[0, :40].tolist(), 'B': lows[1, :40].tolist()})
+    for t in range(40, 60):
+        latest = indicators.update({
+            'A': {'close': closes[0, t], 'high': highs[0, t], 'low': lows[0, t]},
+            'B': {'close': closes[1, t], 'high': highs[1, t], 'low': lows[1, t]}
+        })
+    expected = compute_indicators(closes, highs, lows)
+    for name in ('sma', 'ema_slow', 'macd_signal', 'rsi', 'bollinger_upper', 'atr'):
+        assert latest['indicators']['B'][name] == pytest.approx(expected[name][1, -1], abs=1e-3)
+
+
+def test_fit_uses_ranges_per_ticker():
+    closes, highs, lows = make_series()
+    fitted = TechnicalIndicators().fit({'A': closes[0].tolist(), 'B': closes[1].tolist()},
+                                       {'A': highs[0].tolist()}, {'A': lows[0].tolist()})
+    assert fitted['close_only_atr'] == ['B']
+    assert fitted['indicators']['A']['atr'] == round(compute_indicators(closes[:1], highs[:1], lows[:1])['atr'][0, -1], 4)
+    assert fitted['indicators']['B']['atr'] == round(compute_indicators(closes[1:])['atr'][0, -1], 4)
+
+
+def test_update_rejects_bar_without_close():
+    closes, _, _ = make_series()
+    indicators = TechnicalIndicators()
+    indicators.fit({'A': closes[0].tolist()})
+    with pytest.raises(ValueError, match="needs a 'close'"):
+        indicators.update({'A': {'high': 101.0}})
+    assert indicators.bars == 60